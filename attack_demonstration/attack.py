@@ -3,10 +3,23 @@
 # April 2025
 
 import multiprocessing
+import multiprocessing.connection
+import os
+import time
+import numpy
 from Crypto.Cipher import ChaCha20
 
+import chacha
+import coverage_map
+from candidates import KEY_BYTES, C_RAND, make_candidates, lcg_parameters, key_kernel
 
-kill_event = multiprocessing.Event()
+
+BATCH_SIZE = 65536      # Number of seeds whose keys are derived together in batched mode
+BLOCK_SIZE = 2**20      # Number of seeds a thread takes from the shared cursor at a time
+PROGRESS_INTERVAL = 5.0 # Seconds between progress lines of brute_force
+COUNTERS = 3            # Shared counters per worker: keys tested, candidates covered by finished blocks, start of the current block
+BACKENDS = ("pycryptodome", "numpy")    # pycryptodome: one cipher object per key, numpy: vectorized ChaCha20 (see chacha.py)
+ENUMERATIONS = ("linear", "orbit")      # linear: seeds 0, 1, 2, ..., orbit: follow the LCG cycle (see candidates.orbit_blocks)
 
 
 
@@ -37,90 +50,586 @@ def generate_decryption_key(seed: int):
 
 
 
-def try_seed(seed, constants):
+def try_key(key, constants):
+    """
+        Attempts decryption of the ciphertext with a single key.
+
+        Args:
+            key (bytes): 256 bit key. Any bytes-like object works, e.g. a memoryview slice of a batch of keys
+            constants (dict): Dictionary containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
+
+        Returns:
+            bool: True if key decrypted ciphertext, False otherwise
+    """
+    cipher = ChaCha20.new(key=key, nonce=constants["nonce"])
+    decrypted_ciphertext = cipher.decrypt(constants["ciphertext"])
+
+    if(decrypted_ciphertext == constants["plaintext"]):
+        return True
+    return False
+
+
+
+def try_seed(seed, constants, params=C_RAND):
     """ 
         Worker function. Generates a 256 bit key using seed and attempts decryption with it.
 
         Args:
             seed (int): LCG initial seeding value
             constants (dict): Dictionary containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
+            params (tuple): LCG the key is derived with, see candidates.lcg_parameters
         
         Returns:
             bool: True if seed decrypted ciphertext, False otherwise
 
     """
-    key = generate_decryption_key(seed)
-    cipher = ChaCha20.new(key=key, nonce=constants["nonce"])
-    decrypted_ciphertext = cipher.decrypt(constants["ciphertext"])
+    if(params != C_RAND):
+        return try_key(key_kernel(params)(numpy.array([seed], dtype=numpy.uint64)), constants)
+    return try_key(generate_decryption_key(seed), constants)
 
-    if(decrypted_ciphertext == constants["plaintext"]):
-        return True
-    return False
+
+
+def search_keys(keys, constants, stride=KEY_BYTES, stop_event=None):
+    """
+        Checks a batch of keys one at a time with PyCryptodome.
+
+        Args:
+            keys (bytes): Buffer holding the keys, the key i is keys[stride * i: stride * i + 32]
+            constants (dict): Dictionary containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
+            stride (int): Bytes between the starts of neighbouring keys
+            stop_event (multiprocessing.Event): Checked before every key, the search ends early once it is set
+
+        Returns:
+            list: Indices of the keys within the batch that decrypt the ciphertext
+    """
+    keys = memoryview(keys)     # Slices of a memoryview do not copy
+
+    found = []
+    for i in range((len(keys) - KEY_BYTES) // stride + 1):
+        # Stop thread if result has been found
+        if(stop_event is not None and stop_event.is_set()):
+            break
+
+        if(try_key(keys[stride * i:stride * i + KEY_BYTES], constants) == True):
+            found.append(i)
+
+    return found
+
+
+
+def key_words_of(keys, stride=KEY_BYTES):
+    """
+        Rearranges a buffer of keys for the vectorized ChaCha20 kernel. ChaCha20 reads the key as little endian words.
+
+        Returns:
+            numpy.ndarray: (8, n) uint32 array, column i holds the words of key i
+    """
+    words = numpy.frombuffer(keys, dtype="<u4")
+    step = stride // 4
+    count = (len(words) - 8) // step + 1
+    return numpy.stack([words[j:j + step * (count - 1) + 1:step] for j in range(8)])
 
 
 
-def worker(start, stop, constants, results):
+def build_target_index(targets):
+    """
+        Indexes targets for batch attacks. Targets are grouped by nonce (and known keystream length) so a single keystream 
+        computation per key serves the whole group, then looked up by the keystream prefix the true key must produce.
+
+        Args:
+            targets (list): Dictionaries containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
+
+        Returns:
+            dict: {(nonce, length): (prefixes, sorted_prefixes)} where prefixes maps chacha.prefix_value() to the indices of the targets 
+            and sorted_prefixes holds the same values as a sorted uint64 array for vectorized lookups
+    """
+    groups = {}
+    for t, target in enumerate(targets):
+        length = min(len(target["plaintext"]), len(target["ciphertext"]), chacha.PREFIX_BYTES)
+        keystream = bytes(p ^ c for p, c in zip(target["plaintext"][:length], target["ciphertext"][:length]))
+        prefixes = groups.setdefault((target["nonce"], length), {})
+        prefixes.setdefault(chacha.prefix_value(keystream), []).append(t)
+
+    index = {}
+    for group, prefixes in groups.items():
+        index[group] = (prefixes, numpy.array(sorted(prefixes), dtype=numpy.uint64))
+    return index
+
+
+
+def search_keys_batch(keys, targets, index, backend="pycryptodome", stride=KEY_BYTES):
+    """
+        Checks a batch of keys against many targets at once. Each key is used for one keystream computation per nonce group and the
+        prefix is looked up in the index instead of being compared with every target. Hits are confirmed with PyCryptodome.
+
+        Args:
+            keys (bytes): Buffer holding the keys, the key i is keys[stride * i: stride * i + 32]
+            targets (list): Dictionaries containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
+            index (dict): Result of build_target_index(targets)
+            backend (str): One of BACKENDS
+            stride (int): Bytes between the starts of neighbouring keys
+
+        Returns:
+            list: (key index, target index) for every key that decrypts a target
+    """
+    keys = memoryview(keys)
+    found = []
+
+    if(backend == "numpy"):
+        key_words = key_words_of(keys, stride)
+
+        for (nonce, length), (prefixes, sorted_prefixes) in index.items():
+            values = chacha.keystream_prefixes(key_words, nonce, length)
+            positions = numpy.minimum(numpy.searchsorted(sorted_prefixes, values), len(sorted_prefixes) - 1)
+
+            for i in numpy.flatnonzero(sorted_prefixes[positions] == values):
+                i = int(i)
+                for t in prefixes[int(values[i])]:
+                    if(try_key(keys[stride * i:stride * i + KEY_BYTES], targets[t]) == True):
+                        found.append((i, t))
+        return found
+
+    for i in range((len(keys) - KEY_BYTES) // stride + 1):
+        key = keys[stride * i:stride * i + KEY_BYTES]
+
+        for (nonce, length), (prefixes, sorted_prefixes) in index.items():
+            keystream = ChaCha20.new(key=key, nonce=nonce).encrypt(bytes(length))
+            for t in prefixes.get(chacha.prefix_value(keystream), ()):
+                if(try_key(key, targets[t]) == True):
+                    found.append((i, t))
+
+    return found
+
+
+
+def search_keys_numpy(keys, constants, target, stride=KEY_BYTES):
+    """
+        Checks a batch of keys with the vectorized ChaCha20 kernel. Only the keystream prefix is compared, so every candidate 
+        is confirmed with PyCryptodome before it is reported.
+
+        Args:
+            keys (bytes): Buffer holding the keys, the key i is keys[stride * i: stride * i + 32]
+            constants (dict): Dictionary containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
+            target (dict): Result of chacha.prepare_target(constants)
+            stride (int): Bytes between the starts of neighbouring keys
+
+        Returns:
+            list: Indices of the keys within the batch that decrypt the ciphertext
+    """
+    found = []
+    for i in chacha.find_candidates(key_words_of(keys, stride), target):
+        i = int(i)
+        if(try_key(keys[stride * i:stride * i + KEY_BYTES], constants) == True):
+            found.append(i)
+
+    return found
+
+
+
+def search_range(start, stop, constants, stop_event=None, batch_size=BATCH_SIZE, backend="pycryptodome", source=None, progress=None):
     '''
         Checks all numbers from start to stop as seeds for the LCG based key.
 
         Args:
-            start (int): The first candidate key
+            start (int): The first candidate key, an index into source
             stop (int): The last candidate key (exclusive)
             constants (dict): Dictionary containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
-            results (list): Multiprocessing manager list where results are stored
-    
+            stop_event (multiprocessing.Event): The search ends early once it is set
+            batch_size (int): Number of keys derived at once with candidates.generate_decryption_keys. None derives each key on its own.
+            backend (str): One of BACKENDS. The numpy backend always works in batches.
+            source (candidates.LinearCandidates): Candidate source that maps the indices to seeds, see candidates.py. None tries
+                the seeds start to stop themselves
+            progress (function): Called with the number of keys tested after every batch (every 4096 seeds without batches)
+
+        Returns:
+            list: The seeds that decrypt the ciphertext
     '''
-    for i in range(start, stop):
+    found = []
+    source = source or make_candidates("linear", 31)
+
+    if(batch_size is None and backend == "pycryptodome" and source.name == "linear" and source.params == C_RAND):
+        tested = 0      # Seeds actually tried, a stop or a hit can end the block early
+        for i in range(start, stop):
+            # Stop thread if result has been found
+            if(stop_event is not None and stop_event.is_set()):
+                break
+
+            # Try each seed
+            hit = try_seed(i, constants)
+            tested += 1
+            if(progress is not None and tested % 4096 == 0):
+                progress(4096)
+
+            if(hit == True):
+                found.append(i)
+                break
+
+        if(progress is not None):
+            progress(tested % 4096)
+        return found
+
+    if(backend == "numpy"):
+        target = chacha.prepare_target(constants)
+
+    for seeds, keys, stride in source.blocks(start, stop, batch_size or BATCH_SIZE):
         # Stop thread if result has been found
-        if(kill_event.is_set()):
+        if(stop_event is not None and stop_event.is_set()):
             break
-        
-        # Try each seed
-        if(try_seed(i, constants) == True):
-            # If the true seed is found, signal other threads and store seed
-            kill_event.set
-            results.append(i)
 
-    results.append(-1)
+        if(backend == "numpy"):
+            hits = search_keys_numpy(keys, constants, target, stride)
+        else:
+            hits = search_keys(keys, constants, stride, stop_event)
+        if(progress is not None):
+            progress(len(seeds))
+
+        for i in hits:
+            found.append(int(seeds[i]))
+        if(len(found) > 0):
+            break
+
+    return found
+
+
+
+def search_range_batch(start, stop, targets, index, stop_event=None, batch_size=BATCH_SIZE, backend="pycryptodome", source=None, progress=None):
+    '''
+        Checks all numbers from start to stop as seeds against every target. Unlike search_range a hit does not end the search.
+
+        Args:
+            targets (list): Dictionaries containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
+            index (dict): Result of build_target_index(targets)
+            start, stop, stop_event, batch_size, backend, source, progress: See search_range
+
+        Returns:
+            list: (seed, target index) for every recovered target
+    '''
+    found = []
+    source = source or make_candidates("linear", 31)
+
+    for seeds, keys, stride in source.blocks(start, stop, batch_size or BATCH_SIZE):
+        # Stop thread if every target has been found
+        if(stop_event is not None and stop_event.is_set()):
+            break
+
+        for i, t in search_keys_batch(keys, targets, index, backend, stride):
+            found.append((int(seeds[i]), t))
+        if(progress is not None):
+            progress(len(seeds))
+
+    return found
+
+
+
+def open_checkpoint(path: str, constants, source, block_size: int):
+    """ Opens the coverage map of a search over source, see coverage_map.CoverageMap. Raises ValueError for maps of other searches. """
+    return coverage_map.CoverageMap(path, coverage_map.fingerprint(constants, repr(source)), block_size, len(source), 
+                                    getattr(source, "max_seed", 0), source.name)
+
+
+
+def claim_block(cursor, stop: int, block_size: int, coverage=None):
+    """
+        Takes the next block of the key space from the shared cursor. Blocks already marked in the coverage map are skipped.
+
+        Args:
+            cursor (multiprocessing.Value): Start of the unclaimed part of the key space
+            stop (int): End of the key space (exclusive)
+            block_size (int): Size of a block
+            coverage (coverage_map.CoverageMap): Finished blocks of earlier runs. None searches every block
+
+        Returns:
+            tuple: (start, stop) of the claimed block, empty once the key space is exhausted
+    """
+    with cursor.get_lock():
+        start = cursor.value
+        while coverage is not None and start < stop and coverage.is_done(start // block_size):
+            start += block_size
+        start = min(start, stop)
+        cursor.value = min(start + block_size, stop)
+    return (start, min(start + block_size, stop))
+
+
+
+def worker(cursor, stop, block_size, constants, found, stop_event, options, cpu=None, slot=0):
+    '''
+        Repeatedly claims a block from the shared cursor and searches it until the key space is exhausted or a seed is found.
+        Faster threads simply claim more blocks, so no thread idles while another still has a long range left.
+
+        Args:
+            cursor (multiprocessing.Value): Shared start of the unclaimed part of the key space
+            stop (int): End of the key space (exclusive)
+            block_size (int): Number of candidates claimed at a time
+            constants (dict): Dictionary containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes. A list of them for batch attacks
+            found (multiprocessing.Value): Shared slot the found seed is written to, -1 until then. An Array with one slot per target for batch attacks
+            stop_event (multiprocessing.Event): Set once every seed is found, every other thread stops at its next key or batch
+            options (dict): "batch_size", "backend", "source" (see search_range), "checkpoint", the path of the coverage map or None
+                and "counters", the shared progress counters of every worker (COUNTERS per worker)
+            cpu (int): CPU to pin this thread to. None leaves scheduling to the OS
+            slot (int): Index of this thread, its counters start at options["counters"][COUNTERS * slot]
+    
+    '''
+    if(cpu is not None and hasattr(os, "sched_setaffinity")):      # Pinning is only available on Linux
+        os.sched_setaffinity(0, {cpu})
+
+    batch = isinstance(constants, list)
+    if(batch):
+        index = build_target_index(constants)
+
+    checkpoint = None
+    if(options["checkpoint"] is not None):
+        checkpoint = open_checkpoint(options["checkpoint"], constants, options["source"], block_size)
+    last_flush = time.time()
 
+    # Only this thread writes its counters, the parent just reads them so no lock is needed
+    counters = options["counters"]
+    tested, covered, current = COUNTERS * slot, COUNTERS * slot + 1, COUNTERS * slot + 2
+    def progress(count):
+        counters[tested] += count
 
+    try:
+        while not stop_event.is_set():
+            start, end = claim_block(cursor, stop, block_size, checkpoint)
+            if(start >= end):
+                break
+            counters[current] = start
 
-def brute_force(constants, thread_count: int, max_key_length: int):
+            if(batch):
+                hits = search_range_batch(start, end, constants, index, stop_event, options["batch_size"], options["backend"], options["source"], progress)
+                if(len(hits) > 0):
+                    # Store the recovered seeds, once every target has one signal the other threads
+                    with found.get_lock():
+                        for seed, t in hits:
+                            if(found[t] == -1):
+                                found[t] = seed
+                        if(checkpoint is not None):
+                            checkpoint.save_found(found[:])     # Before the block is marked done, see coverage_map.py
+                        if(-1 not in found[:]):
+                            stop_event.set()
+
+            else:
+                seeds = search_range(start, end, constants, stop_event, options["batch_size"], options["backend"], options["source"], progress)
+                if(len(seeds) > 0):
+                    # If the true seed is found, store it and signal the other threads
+                    with found.get_lock():
+                        if(found.value == -1):
+                            found.value = seeds[0]
+                    stop_event.set()
+                    break
+
+            # Only blocks that were searched to the end count as done
+            if(not stop_event.is_set()):
+                counters[covered] += end - start
+            if(checkpoint is not None and not stop_event.is_set()):
+                with cursor.get_lock():
+                    checkpoint.mark_done(start // block_size)
+                if(time.time() - last_flush > coverage_map.FLUSH_INTERVAL):
+                    checkpoint.flush()
+                    last_flush = time.time()
+
+    except KeyboardInterrupt:
+        pass        # brute_force reports the interruption, finished blocks are already in the map
+
+    if(checkpoint is not None):
+        checkpoint.flush()
+        checkpoint.close()
+
+
+
+class AttackStats:
+    def __init__(self, counters, thread_count: int, elapsed: float, space: int, searched: int):
+        """
+            Snapshot of the shared worker counters of a running or finished attack.
+
+            Args:
+                counters (multiprocessing.Array): COUNTERS values per worker, see worker
+                thread_count (int): Number of workers
+                elapsed (float): Seconds since the workers were started
+                space (int): Number of candidates of the search (the key range)
+                searched (int): Candidates already searched by earlier runs (checkpoint)
+        """
+        values = counters[:]
+        self.elapsed = elapsed
+        self.space = space
+        self.worker_keys = values[0::COUNTERS]
+        self.worker_blocks = values[2::COUNTERS]
+        self.keys = sum(self.worker_keys)
+        self.covered = min(sum(values[1::COUNTERS]) + searched, space)
+        self.worker_rates = [keys / elapsed if elapsed > 0 else 0.0 for keys in self.worker_keys]
+        self.rate = sum(self.worker_rates)
+
+        # Imbalance: how much more the busiest worker tested than the average one, 0 for a perfectly even split
+        mean = self.keys / thread_count
+        self.imbalance = max(self.worker_keys) / mean - 1 if mean > 0 else 0.0
+
+        # ETA from the rate finished blocks are covered at during this run
+        self.eta = None
+        if(self.covered > searched):
+            self.eta = (space - self.covered) * elapsed / (self.covered - searched)
+
+    def progress_line(self):
+        """ One line summary printed periodically by brute_force. """
+        eta = "?" if self.eta is None else f"{round(self.eta)} s"
+        return f"{100 * self.covered / max(self.space, 1):.1f}% of {self.space} searched, {self.rate / 1e6:.3f}M keys/s, ETA {eta}"
+
+    def __str__(self):
+        lines = [f"{self.keys} keys in {round(self.elapsed, 2)} seconds, {self.rate / 1e6:.3f}M keys/s, imbalance {100 * self.imbalance:.1f}%"]
+        for i, rate in enumerate(self.worker_rates):
+            lines.append(f"\tWorker {i}: {self.worker_keys[i]} keys, {rate / 1e6:.3f}M keys/s, last block at {self.worker_blocks[i]}")
+        return "\n".join(lines)
+
+
+
+def run_attack(constants, found, thread_count: int, max_key_length: int, batch_size: int, backend: str, enumeration: str, block_size: int, 
+               pin_cpus: bool, checkpoint: str, key_range: tuple, source, progress_interval: float, lcg, word_bytes: int):
+    """
+        Starts the worker threads shared by brute_force and brute_force_batch and waits for them. See brute_force for the arguments.
+
+        Args:
+            found (multiprocessing.Value): Shared result slot(s) handed to every worker
+
+        Returns:
+            AttackStats: Statistics of the finished search, None on bad arguments or Ctrl-C
+    """
+    if(backend not in BACKENDS):
+        print(f"Error! Unknown backend {backend}. Use one of {BACKENDS}.")
+        return None
+    if(enumeration not in ENUMERATIONS):
+        print(f"Error! Unknown enumeration {enumeration}. Use one of {ENUMERATIONS}.")
+        return None
+
+    thread_count = thread_count or os.cpu_count()
+    if(source is None):
+        params = C_RAND if lcg is None else lcg_parameters(lcg.multiplier, lcg.increment, lcg.modulus, word_bytes)
+        source = None if params is None else make_candidates(enumeration, max_key_length, params)
+        if(source is None):
+            return None
+    stop = len(source)
+    block_size = source.claim_size(block_size)
+
+    first, last = 0, stop
+    if(key_range is not None):
+        first = (key_range[0] // block_size) * block_size
+        last = min(-(-key_range[1] // block_size) * block_size, stop)
+
+    counters = multiprocessing.Array("q", COUNTERS * thread_count, lock=False)
+    options = {"batch_size": batch_size, "backend": backend, "source": source, "checkpoint": checkpoint, "counters": counters}
+    searched = 0
+    if(checkpoint is not None):
+        try:
+            checkpoint_map = open_checkpoint(checkpoint, constants, source, block_size)
+        except ValueError as e:
+            print(f"Error! {e}")
+            return None
+        if(checkpoint_map.done_count() > 0):
+            print(f"Resuming from {checkpoint}: {checkpoint_map.done_count()} of {checkpoint_map.block_count} blocks already searched.")
+
+        # Seeds of batch targets recovered by earlier runs, their blocks are already marked done
+        recovered = checkpoint_map.load_found()
+        if(isinstance(constants, list) and len(recovered) == len(constants)):
+            for t, seed in enumerate(recovered):
+                found[t] = seed
+        searched = sum(min(block_size, last - block * block_size) for block in range(first // block_size, -(-last // block_size)) if checkpoint_map.is_done(block))
+        checkpoint_map.close()
+
+    cpus = None
+    if(pin_cpus and hasattr(os, "sched_getaffinity")):
+        cpus = sorted(os.sched_getaffinity(0))
+
+    cursor = multiprocessing.Value("q", first)      # Start of the unclaimed key space
+    stop_event = multiprocessing.Event()
+    if(isinstance(constants, list) and -1 not in found[:]):
+        stop_event.set()        # Every target was recovered by earlier runs
+    processes = []
+
+    # Start the threads
+    for i in range(thread_count):
+        cpu = None if cpus is None else cpus[i % len(cpus)]
+        p = multiprocessing.Process(target=worker, args=(cursor, last, block_size, constants, found, stop_event, options, cpu, i, ))
+        processes.append(p)
+        p.start()
+
+    start_time = time.time()
+    last_report = start_time
+    try:
+        while any(p.is_alive() for p in processes):
+            multiprocessing.connection.wait([p.sentinel for p in processes], PROGRESS_INTERVAL if progress_interval is None else progress_interval)
+            if(progress_interval is not None and time.time() - last_report >= progress_interval and not stop_event.is_set()):
+                print(AttackStats(counters, thread_count, time.time() - start_time, last - first, searched).progress_line())
+                last_report = time.time()
+    except KeyboardInterrupt:
+        stop_event.set()
+        for p in processes:
+            p.join()
+        if(checkpoint is not None):
+            print(f"Interrupted! Progress is saved in {checkpoint}, run the same search again to resume.")
+        return None
+
+    for p in processes:
+        p.join()
+    return AttackStats(counters, thread_count, time.time() - start_time, last - first, searched)
+
+
+
+def brute_force(constants, thread_count: int, max_key_length: int, batch_size: int = BATCH_SIZE, backend: str = "pycryptodome", enumeration: str = "linear", 
+                block_size: int = BLOCK_SIZE, pin_cpus: bool = False, checkpoint: str = None, key_range: tuple = None, source = None,
+                progress_interval: float = PROGRESS_INTERVAL, return_stats: bool = False, lcg = None, word_bytes: int = None):
     """
         Brute forces 32 bit LCG generated key encrypted with ChaCha20.
 
+        The key space is handed out in blocks through a shared cursor, so threads that finish early keep working, and the first 
+        thread to find the seed stops every other thread. On average the seed is found after half of the key space.
+
         Args:
             constants (dict): Dictionary containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
-            processes (int): Number of threads to create. Use CPU core count. 4 should be safe for everybody
+            thread_count (int): Number of threads to create. Use CPU core count. None uses every core
             max_key_length (int): The power of two representing the number of keys that will be checked. Keys = 2^max_key_length
+            batch_size (int): Number of keys each thread derives at once using NumPy. None derives keys one seed at a time.
+            backend (str): One of BACKENDS. "pycryptodome" decrypts with one cipher object per key, "numpy" evaluates ChaCha20 for a whole batch at once.
+            enumeration (str): One of ENUMERATIONS. "orbit" walks the whole LCG cycle with one LCG step per key. Every thread jumps 
+                straight to its part of the cycle, seeds of 2^max_key_length or more are skipped before any decryption.
+            block_size (int): Number of candidates a thread claims at a time. Smaller blocks react faster but take the lock more often
+            pin_cpus (bool): Pin each thread to its own CPU (Linux only)
+            checkpoint (str): Path of a coverage map (see coverage_map.py). Finished blocks are recorded there and skipped when the
+                same search is started again, e.g. after a crash or Ctrl-C
+            key_range (tuple): (first, last) to only search part of the key space (seeds, or cycle positions for "orbit"). 
+                It is widened to whole blocks. Coverage maps of runs over disjoint ranges can be merged with coverage_map.py
+            source (candidates.LinearCandidates): Custom candidate source, e.g. candidates.TimeCandidates to try seeds close to a 
+                time estimate first. Replaces enumeration and max_key_length, key_range then holds indices into the source
+            progress_interval (float): Seconds between progress lines (share of the key space searched, keys/s and ETA). None prints none
+            return_stats (bool): Also return the AttackStats of the search, with the throughput of every worker and their imbalance
+            lcg (encrypt.LCG): LCG the victim derived its key with, only its multiplier, increment and modulus are used. None is C rand.
+                A key derivation specialized to these parameters is built once (see candidates.key_kernel). Linear enumeration only
+            word_bytes (int): Bytes per LCG output in the key. None uses modulus.bit_length() / 8 like encrypt.generate_key
+
+        Returns:
+            int: The found seed, -1 if no seed decrypts the ciphertext. (seed, AttackStats) if return_stats is set, the stats are None
+                if the search did not run
         
     """
+    found = multiprocessing.Value("q", -1)          # Found seed
+    stats = run_attack(constants, found, thread_count, max_key_length, batch_size, backend, enumeration, block_size, pin_cpus, checkpoint, key_range, source, progress_interval, lcg, word_bytes)
+    seed = -1 if stats is None else found.value
+    return (seed, stats) if return_stats else seed
 
-    stop = 2**max_key_length - 1
-    step = int(stop / thread_count + 1)
-
-    thread_start = 0
-    thread_stop = step
 
-    with multiprocessing.Manager() as manager:
-        results = manager.list()    # List for threads to store their results (-1 or some seed value)
-        processes = []
 
-        # Start the threads
-        for i in range(thread_count + 1):
-            p = multiprocessing.Process(target=worker, args=(thread_start, thread_stop, constants, results, ))
-            processes.append(p)
-            p.start()
-            thread_start = thread_start + step  # Each thread operates on a range within the key space
-            thread_stop = thread_stop + step
+def brute_force_batch(targets, thread_count: int, max_key_length: int, batch_size: int = BATCH_SIZE, backend: str = "pycryptodome", enumeration: str = "linear", 
+                      block_size: int = BLOCK_SIZE, pin_cpus: bool = False, checkpoint: str = None, key_range: tuple = None, source = None,
+                      progress_interval: float = PROGRESS_INTERVAL, return_stats: bool = False, lcg = None, word_bytes: int = None):
+    """
+        Brute forces many ciphertexts whose keys came from the same weak generator in a single sweep. Every candidate key is derived 
+        once and checked against all targets (see search_keys_batch), so N targets cost about as much as one.
+        The search ends once every target is recovered or the key space is exhausted.
 
-        for i in processes:
-            i.join()
-    
-        r = list(results)
+        Args:
+            targets (list): Dictionaries containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
+            thread_count, max_key_length, batch_size, backend, enumeration, block_size, pin_cpus, checkpoint, key_range, source, 
+            progress_interval, return_stats, lcg, word_bytes: See brute_force
 
-    # Return the found seed
-    for i in r:
-        if i != -1:
-            return i
-    return -1
\ No newline at end of file
+        Returns:
+            list: The seed of every target in order, -1 for targets that were not recovered. (seeds, AttackStats) if return_stats is set
+    """
+    found = multiprocessing.Array("q", [-1] * len(targets))        # Found seed of each target
+    stats = run_attack(list(targets), found, thread_count, max_key_length, batch_size, backend, enumeration, block_size, pin_cpus, checkpoint, key_range, source, progress_interval, lcg, word_bytes)
+    return (list(found), stats) if return_stats else list(found)
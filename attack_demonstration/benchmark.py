@@ -0,0 +1,261 @@
+# Group 7
+# CPSC 418 - Explorations of Pseudo Random Number Generation
+# April 2025
+
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+
+from encrypt import LCG, generate_key, encrypt
+from attack import BATCH_SIZE, BLOCK_SIZE, brute_force, brute_force_batch
+from candidates import ORBIT_LENGTH, OrbitCandidates
+
+"""
+    Scaling benchmark of attack.brute_force and attack.brute_force_batch.
+
+    A victim seed is planted at a known position of the key space, so every run tests the same number of keys before the hit. For the
+    orbit enumeration the position is one along the LCG cycle, for batch attacks the targets are spread up to the position and the hit
+    is the last of them. For every configuration (see CONFIGURATIONS) the benchmark measures the time to the first hit, the throughput and the process
+    startup overhead for a sweep of worker counts, each as the median of several repeats after a warmup run.
+
+    Throughput is reported twice. keys/s counts the keys that were derived and decrypted. candidates/s counts the positions of the enumeration up to
+    the hit, the same way for every backend. For the linear enumeration they only differ by the rest of the batch after the hit, but the orbit
+    enumeration walks the whole LCG cycle and only decrypts the one in 2^(31 - seed_bits) positions that is below 2^seed_bits, so its candidates/s
+    are the cycle positions it scans per second.
+    Startup is the time to a hit planted at position 0 of the enumeration, the process startup plus a single batch.
+
+        Strong scaling: fixed seed_bits, growing worker count. Ideal is a speedup equal to the worker count.
+        Weak scaling: seed_bits grows with the worker count (one more bit per doubling). Ideal is a constant time to the first hit.
+
+    A sweep over seed_bits with every worker is run as well. Results are written as <prefix>.json and one csv per table
+    (<prefix>_bits.csv, <prefix>_strong.csv, <prefix>_weak.csv):
+        py benchmark.py [output_prefix] [min_bits] [max_bits] [max_workers] [repeats]
+"""
+
+CONFIGURATIONS = (                      # (name, backend, batch_size, enumeration, targets), more than 1 target runs brute_force_batch
+    ("pycryptodome-scalar", "pycryptodome", None, "linear", 1),
+    ("pycryptodome", "pycryptodome", BATCH_SIZE, "linear", 1),
+    ("numpy", "numpy", BATCH_SIZE, "linear", 1),
+    ("numpy-orbit", "numpy", BATCH_SIZE, "orbit", 1),
+    ("pycryptodome-batch", "pycryptodome", BATCH_SIZE, "linear", 8),
+    ("numpy-batch", "numpy", BATCH_SIZE, "linear", 8),
+)
+PLANT_POSITION = 0.5        # Share of the key space in front of the planted seed, 0.5 is the average case
+STARTUP_BITS = 8            # Key space of the startup runs, their seed is at position 0 so only one batch is searched (31 bits for orbit)
+MESSAGE = "Hello There"
+
+
+
+def planted_seed(seed_bits: int, position: float, enumeration: str = "linear"):
+    """
+        Seed at the given share of the key space in the order the enumeration tries them. For the orbit enumeration this is the
+        first seed below 2^seed_bits at or after that share of the LCG cycle.
+
+        Returns:
+            tuple: (seed, its index in the enumeration)
+    """
+    if(enumeration != "orbit"):
+        seed = min(int(position * 2**seed_bits), 2**seed_bits - 1)
+        return (seed, seed)
+
+    source = OrbitCandidates(2**seed_bits)
+    start = min(int(position * ORBIT_LENGTH), ORBIT_LENGTH - 1)
+    for offset in list(range(start, ORBIT_LENGTH, 2**16)) + list(range(0, start, 2**16)):
+        seeds = source.seeds(offset, min(offset + 2**16, ORBIT_LENGTH))
+        hits = (seeds < 2**seed_bits).nonzero()[0]
+        if(len(hits) > 0):
+            return (int(seeds[hits[0]]), offset + int(hits[0]))
+
+
+
+def plant(seed_bits: int, position: float = PLANT_POSITION, enumeration: str = "linear"):
+    """
+        Encrypts MESSAGE with the key of a seed at the given share of the key space, see planted_seed.
+
+        Returns:
+            tuple: (constants for brute_force, planted seed, its index in the enumeration)
+    """
+    seed, index = planted_seed(seed_bits, position, enumeration)
+    lcg = LCG()
+    lcg.srand(seed)
+    nonce = os.urandom(8)
+    ciphertext = encrypt(MESSAGE, generate_key(lcg, 256), nonce)
+    return ({"plaintext": MESSAGE.encode(), "ciphertext": ciphertext, "nonce": nonce}, seed, index)
+
+
+
+def run_once(backend: str, batch_size: int, seed_bits: int, workers: int, position: float = PLANT_POSITION, enumeration: str = "linear",
+             targets: int = 1):
+    """
+        Runs one attack on planted seeds. With more than one target they are spread evenly up to position and brute_force_batch
+        searches for all of them at once.
+
+        Returns:
+            tuple: (seconds to the last hit, keys/s of the workers, candidates/s up to the last hit), None if a seed was missed
+    """
+    planted = [plant(seed_bits, position * (t + 1) / targets, enumeration) for t in range(targets)]
+    block_size = max(1024, min(BLOCK_SIZE, 2**seed_bits // (8 * workers)))      # Small key spaces still get split between the workers
+
+    start_time = time.perf_counter()
+    if(targets > 1):
+        found, stats = brute_force_batch([constants for constants, _, _ in planted], workers, seed_bits, batch_size, backend, enumeration,
+                                         block_size=block_size, progress_interval=None, return_stats=True)
+    else:
+        found, stats = brute_force(planted[0][0], workers, seed_bits, batch_size, backend, enumeration, block_size=block_size,
+                                   progress_interval=None, return_stats=True)
+    elapsed = time.perf_counter() - start_time
+
+    seed = [seed for _, seed, _ in planted] if targets > 1 else planted[0][1]
+
+    if(found != seed):
+        print(f"Error! Planted seed {seed} but found {found}.")
+        return None
+    if(stats.elapsed <= 0):
+        return (elapsed, 0.0, 0.0)
+    candidates = max(index for _, _, index in planted) + 1      # Positions of the enumeration up to the last hit
+    return (elapsed, stats.keys / stats.elapsed, candidates / stats.elapsed)
+
+
+
+def measure(name: str, backend: str, batch_size: int, seed_bits: int, workers: int, repeats: int = 3, warmup: int = 1, enumeration: str = "linear",
+            targets: int = 1):
+    """
+        Measures one configuration as the median of repeats runs after warmup runs that are discarded, see run_once.
+
+        Returns:
+            dict: Row of the result tables, None if a run missed the planted seed
+    """
+    startup_bits = 31 if enumeration == "orbit" else STARTUP_BITS     # Position 0 of the cycle is only a seed below 2^8 by chance
+    for _ in range(warmup):
+        run_once(backend, batch_size, startup_bits, workers, 0.0, enumeration)
+
+    startups, hits, rates, candidate_rates = [], [], [], []
+    for _ in range(repeats):
+        startup = run_once(backend, batch_size, startup_bits, workers, 0.0, enumeration)
+        result = run_once(backend, batch_size, seed_bits, workers, PLANT_POSITION, enumeration, targets)
+        if(startup is None or result is None):
+            return None
+        startups.append(startup[0])
+        hits.append(result[0])
+        rates.append(result[1])
+        candidate_rates.append(result[2])
+
+    return {"backend": name, "enumeration": enumeration, "targets": targets, "seed_bits": seed_bits, "workers": workers, "repeats": repeats,
+            "time_to_hit": statistics.median(hits), "keys_per_second": statistics.median(rates),
+            "candidates_per_second": statistics.median(candidate_rates), "startup": statistics.median(startups),
+            "time_to_hit_stdev": statistics.stdev(hits) if repeats > 1 else 0.0}
+
+
+
+def worker_counts(max_workers: int):
+    """ Powers of two up to max_workers, plus max_workers itself. """
+    counts = [2**i for i in range(max_workers.bit_length()) if 2**i <= max_workers]
+    if(counts[-1] != max_workers):
+        counts.append(max_workers)
+    return counts
+
+
+
+def strong_scaling(seed_bits: int, max_workers: int, repeats: int = 3, warmup: int = 1, configurations=CONFIGURATIONS):
+    """ Fixed key space of 2^seed_bits, every worker count. Adds speedup and efficiency relative to one worker. """
+    rows = []
+    for name, backend, batch_size, enumeration, targets in configurations:
+        base = None
+        for workers in worker_counts(max_workers):
+            row = measure(name, backend, batch_size, seed_bits, workers, repeats, warmup, enumeration, targets)
+            if(row is None):
+                continue
+            if(workers == 1):
+                base = row["time_to_hit"]
+            row["speedup"] = base / row["time_to_hit"] if base else None
+            row["efficiency"] = row["speedup"] / workers if base else None
+            print(row)
+            rows.append(row)
+    return rows
+
+
+
+def weak_scaling(base_bits: int, max_workers: int, repeats: int = 3, warmup: int = 1, configurations=CONFIGURATIONS):
+    """ 2^base_bits keys per worker. Adds efficiency, the single worker time over the time with more workers (ideal 1). """
+    rows = []
+    for name, backend, batch_size, enumeration, targets in configurations:
+        base = None
+        for workers in worker_counts(max_workers):
+            seed_bits = base_bits + (workers.bit_length() - 1)      # One more bit per doubling, rounded down for other counts
+            row = measure(name, backend, batch_size, seed_bits, workers, repeats, warmup, enumeration, targets)
+            if(row is None):
+                continue
+            if(workers == 1):
+                base = row["time_to_hit"]
+            row["efficiency"] = base / row["time_to_hit"] if base else None
+            print(row)
+            rows.append(row)
+    return rows
+
+
+
+def bit_sweep(min_bits: int, max_bits: int, workers: int, repeats: int = 3, warmup: int = 1, configurations=CONFIGURATIONS):
+    """ Every seed_bits from min_bits to max_bits with a fixed worker count. """
+    rows = []
+    for name, backend, batch_size, enumeration, targets in configurations:
+        for seed_bits in range(min_bits, max_bits + 1):
+            row = measure(name, backend, batch_size, seed_bits, workers, repeats, warmup, enumeration, targets)
+            if(row is not None):
+                print(row)
+                rows.append(row)
+    return rows
+
+
+
+def write_csv(path: str, rows: list):
+    """ Writes result rows to a csv file, one column per key. """
+    if(len(rows) == 0):
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(dict.fromkeys(key for row in rows for key in row)))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+
+def benchmark(prefix: str = "benchmark", min_bits: int = 16, max_bits: int = 20, max_workers: int = None, repeats: int = 3, warmup: int = 1):
+    """
+        Runs the bit sweep, strong and weak scaling for every configuration and writes the tables.
+
+        Args:
+            prefix (str): Output files are <prefix>.json, <prefix>_bits.csv, <prefix>_strong.csv and <prefix>_weak.csv
+            min_bits (int): Smallest seed_bits of the sweep, also the per worker key space of the weak scaling
+            max_bits (int): Largest seed_bits of the sweep, also the key space of the strong scaling
+            max_workers (int): Largest worker count. None uses every core
+            repeats (int): Measured runs per point
+            warmup (int): Discarded runs per point
+    """
+    max_workers = max_workers or os.cpu_count()
+    machine = {"cpu_count": os.cpu_count(), "platform": sys.platform, "python": sys.version.split()[0]}
+
+    tables = {"machine": machine}
+    tables["bits"] = bit_sweep(min_bits, max_bits, max_workers, repeats, warmup)
+    tables["strong"] = strong_scaling(max_bits, max_workers, repeats, warmup)
+    tables["weak"] = weak_scaling(min_bits, max_workers, repeats, warmup)
+
+    with open(prefix + ".json", "w") as f:
+        json.dump(tables, f, indent=4)
+    for table in ("bits", "strong", "weak"):
+        write_csv(f"{prefix}_{table}.csv", tables[table])
+    print(f"Results written to {prefix}.json")
+
+
+
+if __name__ == "__main__":
+    try:
+        prefix = sys.argv[1] if len(sys.argv) > 1 else "benchmark"
+        min_bits = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+        max_bits = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+        max_workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        repeats = int(sys.argv[5]) if len(sys.argv) > 5 else 3
+        benchmark(prefix, min_bits, max_bits, max_workers, repeats)
+    except ValueError:
+        print("Error! Usage: py benchmark.py [output_prefix] [min_bits] [max_bits] [max_workers] [repeats]")
@@ -0,0 +1,402 @@
+# Group 7
+# CPSC 418 - Explorations of Pseudo Random Number Generation
+# April 2025
+
+import functools
+import numpy
+
+from jump_ahead import jump_coefficients
+
+"""
+    Candidate sources for attack.brute_force.
+
+    A candidate source is an ordered list of seeds the attack tries, together with a fast way to derive their keys in blocks.
+    Threads claim index ranges of a source, so the order of the source is the order the seeds are tried in (roughly, with many threads).
+
+        LinearCandidates    seeds 0, 1, 2, ... below 2^max_key_length
+        OrbitCandidates     every seed below 2^31 in the order of the LCG cycle, one LCG step per key
+        TimeCandidates      microsecond timestamps expanding outward from an estimate, for victims seeded with the time
+        RandTimeCandidates  rand() seeded with such timestamps (seed_gen.seed_standard_rand)
+
+    Every block is a tuple (seeds, keys, stride): the key of seeds[i] is keys[stride * i: stride * i + 32].
+
+    Keys are derived like encrypt.generate_key with an LCG given by its parameters (multiplier, increment, modulus, word_bytes),
+    see lcg_parameters. The C rand parameters are the default, key_kernel builds a specialized derivation for any other set.
+"""
+
+KEY_BYTES = 32                          # 256 bit keys
+LCG_MULTIPLIER = 1103515245             # C rand parameters, the modulus is 2^31
+LCG_INCREMENT = 12345
+LCG_MASK = 0x7FFFFFFF
+ORBIT_LENGTH = 2**31                    # Full period: every seed below 2^31 lies on a single cycle
+C_RAND = (LCG_MULTIPLIER, LCG_INCREMENT, 2**31, 4)     # Parameters of encrypt.LCG(): multiplier, increment, modulus, bytes per output
+
+
+
+def keys_for_seeds(seeds):
+    """
+        Generates the 256 bit keys of arbitrary seeds at once, see generate_decryption_keys.
+
+        Args:
+            seeds (numpy.ndarray): Seeds as uint64, only their value modulo 2^31 matters (the victim's srand reduces them too)
+
+        Returns:
+            bytes: len(seeds) * 32 bytes. The key for seeds[i] is stored at [32 * i, 32 * (i + 1))
+    """
+    keys = numpy.empty((len(seeds), 8), dtype=">u4")
+    state = seeds.astype(numpy.uint64)
+
+    for i in range(8):
+        state = (LCG_MULTIPLIER * state + LCG_INCREMENT) & LCG_MASK      # Call of rand, % 2^31 (wrapping mod 2^64 is harmless)
+        keys[:, i] = state
+
+    return keys.tobytes()
+
+
+
+def lcg_parameters(multiplier: int, increment: int, modulus: int, word_bytes: int = None):
+    """
+        Validates the parameters of an LCG whose outputs are concatenated into keys like encrypt.generate_key.
+
+        Args:
+            multiplier, increment, modulus (int): Parameters of the LCG, as in encrypt.LCG
+            word_bytes (int): Big endian bytes per output. None uses modulus.bit_length() / 8 like generate_key
+
+        Returns:
+            tuple: (multiplier, increment, modulus, word_bytes), None if keys cannot be derived from these parameters
+    """
+    if(word_bytes is None):
+        if(modulus.bit_length() % 8 != 0):
+            print(f"Error! Outputs of a modulus of {modulus} are {modulus.bit_length()} bits, pass the bytes per output (word_bytes).")
+            return None
+        word_bytes = modulus.bit_length() // 8
+
+    if(word_bytes not in (1, 2, 4, 8) or modulus > 2**(8 * word_bytes) or modulus < 2):
+        print(f"Error! A modulus of {modulus} does not fit keys of {word_bytes} byte words, use 1, 2, 4 or 8 bytes per output.")
+        return None
+    return (multiplier % modulus, increment % modulus, modulus, word_bytes)
+
+
+
+@functools.lru_cache(maxsize=8)
+def key_kernel(params: tuple):
+    """
+        Builds the key derivation of an LCG, a function like keys_for_seeds. The constants, the reduction (a mask for power of two 
+        moduli) and the word type are fixed when the kernel is built, so the loop is the same handful of array operations as the 
+        hand written C rand version. Cached, every block of a search uses the same kernel.
+
+        Args:
+            params (tuple): Result of lcg_parameters
+
+        Returns:
+            function: Maps a uint64 array of seeds to the bytes of their keys
+    """
+    if(params == C_RAND):
+        return keys_for_seeds
+
+    multiplier, increment, modulus, word_bytes = params
+    words = KEY_BYTES // word_bytes
+    dtype = ">u" + str(word_bytes)
+
+    if(modulus & (modulus - 1) == 0):
+        # Power of two: arithmetic wraps mod 2^64, masking reduces it further
+        a, c, mask = numpy.uint64(multiplier), numpy.uint64(increment), numpy.uint64(modulus - 1)
+        def reduce(state):
+            return state & mask
+        def step(state):
+            return (a * state + c) & mask
+
+    elif(modulus <= 2**32):
+        # a * state + c stays below 2^64 since both are below the modulus
+        a, c, m = numpy.uint64(multiplier), numpy.uint64(increment), numpy.uint64(modulus)
+        def reduce(state):
+            return state % m
+        def step(state):
+            return (a * state + c) % m
+
+    else:
+        # Products do not fit 64 bits, fall back to Python integers in object arrays
+        def reduce(state):
+            return state.astype(object) % modulus
+        def step(state):
+            return (multiplier * state + increment) % modulus
+
+    def kernel(seeds):
+        keys = numpy.empty((len(seeds), words), dtype=dtype)
+        state = reduce(seeds.astype(numpy.uint64))      # srand
+        for i in range(words):
+            state = step(state)                         # Call of rand
+            keys[:, i] = state
+        return keys.tobytes()
+
+    return kernel
+
+
+
+def generate_decryption_keys(start: int, count: int):
+    """
+        Generates the 256 bit keys for count consecutive seeds at once. The LCG recurrence from generate_decryption_key
+        is applied to the whole block of seeds as uint64 arrays and the words are written into one big endian buffer.
+
+        Args:
+            start (int): The first seed of the block
+            count (int): The number of seeds in the block
+
+        Returns:
+            bytes: count * 32 bytes. The key for seed start + i is stored at [32 * i, 32 * (i + 1))
+    """
+    return keys_for_seeds(numpy.arange(start, start + count, dtype=numpy.uint64))
+
+
+
+def lcg_jump(steps: int):
+    """
+        Computes the coefficients of the C rand LCG advanced by steps calls of rand, f^steps(x) = A * x + C mod 2^31.
+        See jump_coefficients (jump_ahead.py), it takes O(log steps) operations.
+
+        Args:
+            steps (int): Number of calls of rand
+
+        Returns:
+            tuple: (A, C)
+    """
+    return jump_coefficients(LCG_MULTIPLIER, LCG_INCREMENT, LCG_MASK + 1, steps)
+
+
+
+def linear_blocks(start: int, stop: int, batch_size: int, params: tuple = C_RAND):
+    """
+        Yields the candidate seeds start, start + 1, ..., stop - 1 in blocks together with their keys under the LCG params.
+
+        Yields:
+            tuple: (seeds, keys, stride) where the key of seeds[i] is keys[stride * i: stride * i + 32]
+    """
+    for block_start in range(start, stop, batch_size):
+        count = min(batch_size, stop - block_start)
+        seeds = numpy.arange(block_start, block_start + count, dtype=numpy.uint64)
+        yield (seeds, key_kernel(params)(seeds), KEY_BYTES)
+
+
+
+@functools.lru_cache(maxsize=4)
+def orbit_coefficients(count: int):
+    """
+        Coefficients of f^i(x) = A_i * x + C_i for every offset i < count. Cached since every block of a thread reuses them.
+
+        Returns:
+            tuple: (A, C) as uint64 arrays
+    """
+    multipliers = numpy.empty(count, dtype=numpy.uint64)
+    increments = numpy.empty(count, dtype=numpy.uint64)
+    a, c = 1, 0
+    for i in range(count):
+        multipliers[i], increments[i] = a, c
+        a, c = (LCG_MULTIPLIER * a) & LCG_MASK, (LCG_MULTIPLIER * c + LCG_INCREMENT) & LCG_MASK
+
+    return (multipliers, increments)
+
+
+
+def orbit_blocks(start: int, stop: int, batch_size: int, max_seed: int = ORBIT_LENGTH):
+    """
+        Yields candidates by walking the LCG cycle instead of counting seeds. Position p of the cycle holds x_p = f^p(0) and the key
+        of seed x_p is the window (x_p+1, ..., x_p+8), so neighbouring positions share seven key words. Each block needs one LCG step 
+        per candidate and the keys are overlapping 32 byte windows of a single big endian buffer.
+
+        Args:
+            start (int): First position of the cycle, reached with lcg_jump
+            stop (int): Last position of the cycle (exclusive)
+            batch_size (int): Positions per block
+            max_seed (int): Only seeds below this are candidates. The cycle holds every seed below 2^31 in a scrambled order, 
+                so the surviving windows are copied out and yielded once a full batch of them has been collected
+
+        Yields:
+            tuple: (seeds, keys, stride), see linear_blocks
+    """
+    multipliers, increments = orbit_coefficients(batch_size + 8)     # The window of the last position reaches 8 past the block
+    state = lcg_jump(start)[1]          # f^start(0)
+    pending_seeds, pending_keys, pending = [], [], 0
+
+    for block_start in range(start, stop, batch_size):
+        count = min(batch_size, stop - block_start)
+        states = (multipliers[:count + 8] * state + increments[:count + 8]) & LCG_MASK      # One LCG step per position
+        state = int(states[count])
+
+        if(max_seed >= ORBIT_LENGTH):
+            yield (states[:count], states[1:].astype(">u4").tobytes(), 4)
+            continue
+
+        selected = numpy.flatnonzero(states[:count] < max_seed)
+        pending_seeds.append(states[selected])
+        pending_keys.append(numpy.stack([states[selected + 1 + j] for j in range(8)], axis=1))
+        pending += len(selected)
+
+        if(pending >= batch_size or (block_start + batch_size >= stop and pending > 0)):
+            yield (numpy.concatenate(pending_seeds), numpy.concatenate(pending_keys).astype(">u4").tobytes(), KEY_BYTES)
+            pending_seeds, pending_keys, pending = [], [], 0
+
+
+
+class LinearCandidates:
+    def __init__(self, max_seed: int, params: tuple = C_RAND):
+        """ The seeds 0, 1, ..., max_seed - 1 in order. The keys are derived with the LCG params, see lcg_parameters. """
+        self.max_seed = max_seed
+        self.params = tuple(params)
+        self.name = "linear"
+
+    def __len__(self):
+        return self.max_seed
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(str(argument) for argument in self.arguments())})"
+
+    def arguments(self):
+        """ Constructor arguments, describe() and from_description() use them to send a source over the network. """
+        return (self.max_seed, ) + self.params_argument()
+
+    def params_argument(self):
+        """ The LCG parameters as a trailing constructor argument, left out for C rand. """
+        return () if self.params == C_RAND else (list(self.params), )
+
+    def claim_size(self, block_size: int):
+        """ Number of indices a thread should claim at a time. """
+        return block_size
+
+    def seeds(self, start: int, stop: int):
+        """ Returns the seeds at indices start to stop (exclusive) as uint64. """
+        return numpy.arange(start, stop, dtype=numpy.uint64)
+
+    def blocks(self, start: int, stop: int, batch_size: int):
+        """ Yields the (seeds, keys, stride) blocks of the indices start to stop (exclusive). """
+        return linear_blocks(start, stop, batch_size, self.params)
+
+
+
+class OrbitCandidates(LinearCandidates):
+    def __init__(self, max_seed: int = ORBIT_LENGTH):
+        """ Every seed below max_seed in the order of the LCG cycle, see orbit_blocks. Index i is position i of the cycle. C rand only. """
+        self.max_seed = max_seed
+        self.params = C_RAND
+        self.name = "orbit"
+
+    def __len__(self):
+        return ORBIT_LENGTH     # The orbit always spans all 2^31 seeds
+
+    def claim_size(self, block_size: int):
+        if(self.max_seed >= ORBIT_LENGTH):
+            return block_size
+        # Only one in ORBIT_LENGTH / max_seed positions is tested, so claim proportionally larger blocks
+        return max(block_size, min(block_size * (ORBIT_LENGTH // self.max_seed), ORBIT_LENGTH // 256))
+
+    def seeds(self, start: int, stop: int):
+        multipliers, increments = orbit_coefficients(stop - start)
+        return (multipliers * lcg_jump(start)[1] + increments) & LCG_MASK
+
+    def blocks(self, start: int, stop: int, batch_size: int):
+        return orbit_blocks(start, stop, batch_size, self.max_seed)
+
+
+
+class TimeCandidates(LinearCandidates):
+    def __init__(self, estimate: int, radius: int, params: tuple = C_RAND):
+        """
+            Seeds taken from a clock, e.g. int(time.time() * 1000000) as in seed_gen.seed_standard_time. The candidates start at the
+            estimate and expand outward: estimate, estimate + 1, estimate - 1, estimate + 2, ... so a seed close to the estimate is
+            tried within the first few blocks. Clock values below 0 do not exist, so for an estimate closer to 0 than the radius
+            the candidates continue above the estimate only once 0 is reached.
+
+            Args:
+                estimate (int): Best guess of the clock value, in the unit the victim used (microseconds for seed_gen), at least 0
+                radius (int): Largest distance from the estimate that is tried
+                params (tuple): LCG the keys are derived with, see lcg_parameters
+        """
+        if(estimate < 0):
+            raise ValueError("The estimate of a clock value must be at least 0")
+        self.estimate = estimate
+        self.radius = radius
+        self.below = min(radius, estimate)      # Distances below the estimate that are tried
+        self.params = tuple(params)
+        self.name = "time"
+
+    def __len__(self):
+        return self.radius + self.below + 1
+
+    def arguments(self):
+        return (self.estimate, self.radius) + self.params_argument()
+
+    def times(self, start: int, stop: int):
+        """
+            Clock values at indices start to stop (exclusive): index 2k - 1 is estimate + k and index 2k is estimate - k while
+            k <= below, every later index i is estimate + i - below.
+        """
+        i = numpy.arange(start, stop, dtype=numpy.int64)
+        offsets = numpy.where(i % 2 == 1, (i + 1) // 2, -(i // 2))
+        offsets = numpy.where(i > 2 * self.below, i - self.below, offsets)
+        return (self.estimate + offsets).astype(numpy.uint64)
+
+    def seeds(self, start: int, stop: int):
+        return self.times(start, stop)
+
+    def blocks(self, start: int, stop: int, batch_size: int):
+        for block_start in range(start, stop, batch_size):
+            seeds = self.seeds(block_start, min(block_start + batch_size, stop))
+            yield (seeds, key_kernel(self.params)(seeds), KEY_BYTES)
+
+
+
+class RandTimeCandidates(TimeCandidates):
+    def __init__(self, estimate: int, radius: int, multiplier: int = 1103515245, increment: int = 12345, modulus: int = 2**31 - 1, 
+                 params: tuple = C_RAND):
+        """
+            Seeds that are the first output of rand() seeded with a clock, as in seed_gen.seed_standard_rand. The clock values are 
+            ordered like TimeCandidates and every one is mapped through one step of the seeding LCG (testing/lcg.py by default).
+
+            Args:
+                estimate (int): Best guess of the clock value the seeding LCG was seeded with
+                radius (int): Largest distance from the estimate that is tried
+                multiplier, increment, modulus (int): Parameters of the seeding LCG
+                params (tuple): LCG the keys are derived with, see lcg_parameters
+        """
+        super().__init__(estimate, radius, params)
+        self.multiplier = multiplier
+        self.increment = increment
+        self.modulus = modulus
+        self.name = "randtime"
+
+    def arguments(self):
+        return (self.estimate, self.radius, self.multiplier, self.increment, self.modulus) + self.params_argument()
+
+    def seeds(self, start: int, stop: int):
+        # Seeding reduces the clock value first, so the product stays below 2^64 for moduli up to 2^32
+        state = self.times(start, stop) % numpy.uint64(self.modulus)
+        return (numpy.uint64(self.multiplier) * state + numpy.uint64(self.increment)) % numpy.uint64(self.modulus)
+
+
+
+def make_candidates(enumeration: str, max_key_length: int, params: tuple = C_RAND):
+    """ Builds the source of one of the enumerations of attack.brute_force. Returns None for an orbit of other LCG parameters. """
+    if(enumeration == "orbit"):
+        if(params != C_RAND):
+            print("Error! The orbit enumeration only follows the C rand cycle, use the linear enumeration for other LCG parameters.")
+            return None
+        return OrbitCandidates(2**max_key_length)
+    return LinearCandidates(2**max_key_length, params)
+
+
+
+SOURCES = {source.__name__: source for source in (LinearCandidates, OrbitCandidates, TimeCandidates, RandTimeCandidates)}
+
+
+
+def describe(source):
+    """ JSON friendly description of a candidate source: [class name, constructor arguments]. """
+    return [type(source).__name__, list(source.arguments())]
+
+
+
+def from_description(description):
+    """ Rebuilds the candidate source of describe(). Returns None for unknown sources. """
+    name, arguments = description
+    if(name not in SOURCES):
+        return None
+    return SOURCES[name](*arguments)
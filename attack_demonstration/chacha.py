@@ -0,0 +1,149 @@
+# Group 7
+# CPSC 418 - Explorations of Pseudo Random Number Generation
+# April 2025
+
+import numpy
+
+"""
+    NumPy implementation of the ChaCha20 block function used by the "numpy" attack backend in attack.py.
+
+    Instead of building one cipher object per candidate key, the block function is evaluated for thousands of keys at once.
+    Every candidate is a lane of a (16, n) uint32 state array, so each quarter round is a handful of array operations over all lanes.
+    All candidates share the nonce and only block 0 (counter = 0) is computed since the known plaintext starts there.
+
+    Matches are only candidates, short plaintexts can collide, so attack.py confirms every hit with PyCryptodome.
+"""
+
+CONSTANTS = (0x61707865, 0x3320646e, 0x79622d32, 0x6b206574)      # "expand 32-byte k"
+PREFIX_BYTES = 8                                                    # Keystream bytes compared per candidate
+
+
+
+def _rotl(x, r, tmp):
+    """ Rotates every lane of x left by r bits in place. tmp is scratch space with the shape of x. """
+    numpy.left_shift(x, r, out=tmp)
+    numpy.right_shift(x, 32 - r, out=x)
+    numpy.bitwise_or(x, tmp, out=x)
+
+
+
+def _quarter_round(x, a, b, c, d, tmp):
+    """ ChaCha quarter round applied to rows a, b, c, d of the state in place. """
+    x[a] += x[b]; x[d] ^= x[a]; _rotl(x[d], 16, tmp)
+    x[c] += x[d]; x[b] ^= x[c]; _rotl(x[b], 12, tmp)
+    x[a] += x[b]; x[d] ^= x[a]; _rotl(x[d], 8, tmp)
+    x[c] += x[d]; x[b] ^= x[c]; _rotl(x[b], 7, tmp)
+
+
+
+def chacha20_block(key_words, nonce: bytes, counter: int = 0, words: int = 16):
+    """
+        Computes the first words of one ChaCha20 keystream block for many keys at once (64 bit nonce variant, as used by PyCryptodome).
+
+        Args:
+            key_words (numpy.ndarray): (8, n) uint32 array. Column i holds the 8 little endian words of key i
+            nonce (bytes): 8 byte nonce shared by every key
+            counter (int): Block counter
+            words (int): Number of keystream words to return. Only these get the final state addition
+
+        Returns:
+            numpy.ndarray: (words, n) uint32 array of little endian keystream words
+    """
+    n = key_words.shape[1]
+
+    initial = numpy.empty((16, n), dtype=numpy.uint32)
+    initial[0:4] = numpy.array(CONSTANTS, dtype=numpy.uint32)[:, None]
+    initial[4:12] = key_words
+    initial[12] = counter & 0xFFFFFFFF
+    initial[13] = counter >> 32
+    initial[14:16] = numpy.frombuffer(nonce, dtype="<u4")[:, None]
+
+    x = initial.copy()
+    tmp = numpy.empty(n, dtype=numpy.uint32)
+
+    for _ in range(10):
+        # Column rounds
+        _quarter_round(x, 0, 4, 8, 12, tmp)
+        _quarter_round(x, 1, 5, 9, 13, tmp)
+        _quarter_round(x, 2, 6, 10, 14, tmp)
+        _quarter_round(x, 3, 7, 11, 15, tmp)
+
+        # Diagonal rounds
+        _quarter_round(x, 0, 5, 10, 15, tmp)
+        _quarter_round(x, 1, 6, 11, 12, tmp)
+        _quarter_round(x, 2, 7, 8, 13, tmp)
+        _quarter_round(x, 3, 4, 9, 14, tmp)
+
+    return x[:words] + initial[:words]
+
+
+
+def prepare_target(constants):
+    """
+        Precomputes the keystream prefix the true key must produce. Since ciphertext = plaintext XOR keystream this is plaintext XOR ciphertext.
+
+        Args:
+            constants (dict): Dictionary containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
+
+        Returns:
+            dict: "words": expected keystream words, "masks": the known bits of each word, "nonce": bytes
+    """
+    length = min(len(constants["plaintext"]), len(constants["ciphertext"]), PREFIX_BYTES)
+    keystream = bytes(p ^ c for p, c in zip(constants["plaintext"][:length], constants["ciphertext"][:length]))
+
+    # Pad the last word, the mask makes sure only the known bytes are compared
+    word_count = (length + 3) // 4
+    padding = bytes(4 * word_count - length)
+    words = numpy.frombuffer(keystream + padding, dtype="<u4")
+    masks = numpy.frombuffer(b"\xff" * length + padding, dtype="<u4")
+
+    return {"words": words, "masks": masks, "nonce": constants["nonce"]}
+
+
+
+def find_candidates(key_words, target):
+    """
+        Evaluates ChaCha20 for every key and returns the keys whose keystream prefix matches the target.
+
+        Args:
+            key_words (numpy.ndarray): (8, n) uint32 array of little endian key words
+            target (dict): Result of prepare_target
+
+        Returns:
+            numpy.ndarray: Indices (columns of key_words) of the matching keys
+    """
+    word_count = len(target["words"])
+    keystream = chacha20_block(key_words, target["nonce"], 0, max(word_count, 1))
+
+    match = numpy.ones(key_words.shape[1], dtype=bool)
+    for i in range(word_count):
+        match &= (keystream[i] & target["masks"][i]) == target["words"][i]
+
+    return numpy.flatnonzero(match)
+
+
+
+def keystream_prefixes(key_words, nonce: bytes, length: int):
+    """
+        Packs the first length (at most 8) keystream bytes of every key into one integer, used as a hash key when many targets share a nonce.
+
+        Args:
+            key_words (numpy.ndarray): (8, n) uint32 array of little endian key words
+            nonce (bytes): 8 byte nonce shared by every key
+            length (int): Number of keystream bytes
+
+        Returns:
+            numpy.ndarray: n uint64 values, equal to prefix_value() of each keystream prefix
+    """
+    keystream = chacha20_block(key_words, nonce, 0, 2)
+    prefixes = keystream[0].astype(numpy.uint64) | (keystream[1].astype(numpy.uint64) << numpy.uint64(32))
+
+    if length < 8:
+        prefixes &= numpy.uint64((1 << (8 * length)) - 1)
+    return prefixes
+
+
+
+def prefix_value(keystream: bytes):
+    """ Integer form of a keystream prefix of up to 8 bytes, matching keystream_prefixes. """
+    return int.from_bytes(keystream[:PREFIX_BYTES], "little")
@@ -0,0 +1,198 @@
+# Group 7
+# CPSC 418 - Explorations of Pseudo Random Number Generation
+# April 2025
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+
+"""
+    Checkpointing for attack.brute_force.
+
+    A coverage map is a small file holding one bit per block of the key space. A bit is set once a thread has searched the whole block,
+    so a restarted search can skip everything that is already done. The file is memory mapped, every thread sets its bits directly in the
+    shared mapping and the mapping is flushed to disk periodically, so a crash or Ctrl-C loses at most the blocks that were in progress.
+
+    Batch attacks also mark blocks with hits as done, so the seeds they recovered are kept next to the map in <map>.found, keyed by
+    the same fingerprint, and a resumed search starts with them.
+
+    The header records which search the map belongs to (target fingerprint, block size, key space and enumeration). Maps of the same
+    search can be merged, e.g. when separate runs searched disjoint slices of the key space:
+        py coverage_map.py <output_map> <input_map> <input_map> ...
+"""
+
+MAGIC = b"CPSCCOV1"
+HEADER = struct.Struct("<8s16sQQQ8s")       # magic, fingerprint, block_size, stop, max_seed, enumeration
+HEADER_SIZE = 64                            # The bitmap starts here
+FLUSH_INTERVAL = 5.0                        # Seconds between flushes of the mapping to disk
+FOUND_SUFFIX = ".found"                     # Seeds recovered by a batch attack are stored in <map>.found
+
+
+
+def fingerprint(constants, source: str = ""):
+    """
+        Identifies a target so a coverage map is never reused for a different ciphertext.
+
+        Args:
+            constants (dict): Dictionary containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes. A list of them for batch attacks
+            source (str): Description of the candidate source, e.g. the estimate of a candidates.TimeCandidates
+
+        Returns:
+            bytes: 16 byte digest
+    """
+    targets = constants if isinstance(constants, list) else [constants]
+
+    digest = hashlib.sha256()
+    for target in targets:
+        for name in ("nonce", "ciphertext", "plaintext"):
+            digest.update(len(target[name]).to_bytes(4, "big") + target[name])
+    digest.update(source.encode())
+    return digest.digest()[:16]
+
+
+
+class CoverageMap:
+    def __init__(self, path: str, target: bytes, block_size: int, stop: int, max_seed: int, enumeration: str):
+        """
+            Opens the coverage map at path, creating an empty one if the file does not exist.
+
+            Args:
+                path (str): Location of the map
+                target (bytes): fingerprint() of the target
+                block_size (int): Size of the blocks of the key space
+                stop (int): Size of the key space
+                max_seed (int): Largest seed (exclusive) that is tested
+                enumeration (str): Name of the candidate source of the search, see candidates.py
+
+            Raises:
+                ValueError: The existing file belongs to a different search
+        """
+        self.path = path
+        self.block_size = block_size
+        self.block_count = (stop + block_size - 1) // block_size
+        header = HEADER.pack(MAGIC, target, block_size, stop, max_seed, enumeration.encode())
+        size = HEADER_SIZE + (self.block_count + 7) // 8
+
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(header.ljust(HEADER_SIZE, b"\0"))
+                f.truncate(size)
+
+        with open(path, "rb") as f:
+            if os.path.getsize(path) != size or f.read(HEADER.size) != header:
+                raise ValueError(f"{path} is a coverage map of a different search.")
+
+        self.file = open(path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), size)
+
+    def is_done(self, block: int):
+        """ True if the block has been searched completely. """
+        return (self.map[HEADER_SIZE + (block >> 3)] >> (block & 7)) & 1 == 1
+
+    def mark_done(self, block: int):
+        """ Records a completely searched block. Bits share bytes, so concurrent callers must hold a common lock. """
+        self.map[HEADER_SIZE + (block >> 3)] |= 1 << (block & 7)
+
+    def done_count(self):
+        """ Returns the number of completely searched blocks. """
+        return bin(int.from_bytes(self.map[HEADER_SIZE:], "little")).count("1")
+
+    def merge(self, other):
+        """
+            Marks every block that is done in other, a CoverageMap of the same search.
+
+            Raises:
+                ValueError: other belongs to a different search
+        """
+        if other.map[:HEADER.size] != self.map[:HEADER.size]:
+            raise ValueError(f"{other.path} is a coverage map of a different search than {self.path}.")
+
+        merged = bytes(a | b for a, b in zip(self.map[HEADER_SIZE:], other.map[HEADER_SIZE:]))
+        self.map[HEADER_SIZE:] = merged
+
+        # Blocks with hits are done in other, so its seeds must come along
+        mine, theirs = self.load_found(), other.load_found()
+        if len(theirs) > 0:
+            self.save_found(theirs if len(mine) == 0 else [a if a != -1 else b for a, b in zip(mine, theirs)])
+
+    def load_found(self):
+        """
+            Returns the seeds recovered by earlier runs of a batch attack, see save_found.
+
+            Returns:
+                list: Seed of every target, -1 for targets that were not recovered. Empty if nothing was stored for this search
+        """
+        try:
+            with open(self.path + FOUND_SUFFIX, "r") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return []
+
+        if stored["target"] != self.map[8:24].hex():       # The fingerprint follows the magic in the header
+            print(f"Error! {self.path + FOUND_SUFFIX} belongs to a different search, ignoring it.")
+            return []
+        return stored["found"]
+
+    def save_found(self, found: list):
+        """
+            Stores the recovered seeds of a batch attack in <map>.found. The file is replaced atomically, so concurrent callers must
+            hold a common lock but a crash never leaves a partial file.
+
+            Args:
+                found (list): Seed of every target, -1 for targets that were not recovered yet
+        """
+        with open(self.path + FOUND_SUFFIX + ".tmp", "w") as f:
+            json.dump({"target": self.map[8:24].hex(), "found": list(found)}, f)
+        os.replace(self.path + FOUND_SUFFIX + ".tmp", self.path + FOUND_SUFFIX)
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+
+def open_existing(path: str):
+    """ Opens a coverage map using the parameters stored in its own header. """
+    with open(path, "rb") as f:
+        magic, target, block_size, stop, max_seed, enumeration = HEADER.unpack(f.read(HEADER.size))
+
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a coverage map.")
+    return CoverageMap(path, target, block_size, stop, max_seed, enumeration.rstrip(b"\0").decode())
+
+
+
+if __name__ == "__main__":
+    try:
+        if not os.path.exists(sys.argv[1]):
+            shutil.copyfile(sys.argv[2], sys.argv[1])
+            if os.path.exists(sys.argv[2] + FOUND_SUFFIX):
+                shutil.copyfile(sys.argv[2] + FOUND_SUFFIX, sys.argv[1] + FOUND_SUFFIX)
+
+        output = open_existing(sys.argv[1])
+        for path in sys.argv[2:]:
+            other = open_existing(path)
+            output.merge(other)
+            other.close()
+
+        print(f"{sys.argv[1]}: {output.done_count()} of {output.block_count} blocks done.")
+        output.flush()
+        output.close()
+
+    except ValueError as e:
+        print(f"Error! {e} Nothing more is merged.")       # Maps of different searches must not be combined
+        sys.exit(1)
+
+    except Exception as e:
+        print("Error! Call script with at least 2 arguments: output_map input_map ...")
+        print("\toutput_map (string): Map the inputs are merged into. Created as a copy of the first input if it does not exist.")
+        print("\tinput_map (string): Coverage maps of the same search.")
+        print(f"\n {e}")
+        sys.exit(1)
@@ -0,0 +1,348 @@
+# Group 7
+# CPSC 418 - Explorations of Pseudo Random Number Generation
+# April 2025
+
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+import candidates
+import coverage_map
+from attack import BATCH_SIZE, BACKENDS, try_seed, search_range
+
+"""
+    Distributed version of attack.brute_force across several machines.
+
+    A coordinator owns the key space and hands it out in blocks over TCP, any machine can join the search by running a worker:
+        py distributed.py coordinator <victim_file> <port> [max_key_length] [enumeration] [checkpoint]
+        py distributed.py worker <host> <port> [thread_count]
+
+    The victim file is the JSON written by showcase.example (plaintext, nonce and ciphertext in hex). To test on one host, start the
+    coordinator on a port of localhost and run several workers against it from other terminals.
+
+    Every message is one line of JSON. A worker starts one process per thread, each claims blocks with "lease" and reports them with
+    "done". Leases expire after LEASE_TIMEOUT seconds unless renewed by the worker's "heartbeat", so the blocks of a crashed or
+    disconnected machine are handed out again. Once a worker reports a seed (verified by the coordinator), every reply carries
+    "stop" and the workers end their current batch.
+"""
+
+LEASE_TIMEOUT = 30.0        # Seconds until an unrenewed lease is handed to another worker
+HEARTBEAT_INTERVAL = 2.0    # Seconds between the heartbeats of a worker, renewing its leases
+BLOCK_SIZE = 2**22          # Candidates per lease, larger than attack.BLOCK_SIZE to keep the network traffic low
+LINGER = 2 * HEARTBEAT_INTERVAL     # Seconds the coordinator keeps answering after the search ended so every worker learns about it
+
+
+
+class Coordinator:
+    def __init__(self, constants, source, block_size: int = BLOCK_SIZE, backend: str = "numpy", batch_size: int = BATCH_SIZE, checkpoint: str = None):
+        """
+            State of a distributed search. Every method is called from the handler threads of the server and takes the lock.
+
+            Args:
+                constants (dict): Dictionary containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
+                source (candidates.LinearCandidates): Candidate source that is searched
+                block_size (int): Candidates per lease
+                backend (str): Backend the workers use, one of attack.BACKENDS
+                batch_size (int): Keys the workers derive at once
+                checkpoint (str): Path of a coverage map of finished leases, see coverage_map.py. None keeps them in memory only
+        """
+        self.constants = constants
+        self.source = source
+        self.block_size = source.claim_size(block_size)
+        self.block_count = (len(source) + self.block_size - 1) // self.block_size
+        self.config = {"constants": {name: value.hex() for name, value in constants.items()}, "source": candidates.describe(source),
+                       "backend": backend, "batch_size": batch_size}
+
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.cursor = 0             # First block that was never leased
+        self.leases = {}            # block: (worker, deadline)
+        self.done = set()
+        self.seed = -1
+        self.workers = set()
+
+        self.checkpoint = None
+        self.last_flush = time.time()
+        if(checkpoint is not None):
+            self.checkpoint = coverage_map.CoverageMap(checkpoint, coverage_map.fingerprint(constants, repr(source)), self.block_size,
+                                                       len(source), getattr(source, "max_seed", 0), source.name)
+            self.done = {block for block in range(self.block_count) if self.checkpoint.is_done(block)}
+
+    def status(self):
+        """ Reply sent to workers once the search is over, None while it runs. """
+        if(self.finished.is_set()):
+            return {"stop": True, "seed": self.seed}
+        return None
+
+    def lease(self, worker: str):
+        """ Hands out the next block: an expired lease if there is one, otherwise a block that was never leased. """
+        with self.lock:
+            if(self.status() is not None):
+                return self.status()
+
+            now = time.time()
+            block = None
+            for leased, (owner, deadline) in self.leases.items():
+                if(deadline < now):
+                    print(f"Lease of block {leased} by {owner} expired, handing it out again.")
+                    block = leased
+                    break
+
+            if(block is None):
+                while self.cursor < self.block_count and self.cursor in self.done:
+                    self.cursor += 1
+                if(self.cursor == self.block_count):
+                    # Everything is leased, the worker waits in case a lease expires
+                    return {"wait": HEARTBEAT_INTERVAL}
+                block = self.cursor
+                self.cursor += 1
+
+            self.leases[block] = (worker, now + LEASE_TIMEOUT)
+            start = block * self.block_size
+            return {"block": block, "start": start, "end": min(start + self.block_size, len(self.source))}
+
+    def heartbeat(self, worker: str):
+        """ Renews every lease held by the worker. """
+        with self.lock:
+            self.workers.add(worker)
+            deadline = time.time() + LEASE_TIMEOUT
+            for block, (owner, _) in self.leases.items():
+                if(owner == worker):
+                    self.leases[block] = (owner, deadline)
+            return self.status() or {}
+
+    def complete(self, worker: str, block: int, seeds: list):
+        """ Records a searched block and the seeds found in it. Seeds are verified so a faulty worker cannot end the search. """
+        with self.lock:
+            for seed in seeds:
+                if(self.seed == -1 and try_seed(seed, self.constants, self.source.params)):
+                    print(f"Seed {seed} found by {worker}.")
+                    self.seed = seed
+                    self.finished.set()
+
+            if(len(seeds) == 0 and self.leases.get(block, (None, 0))[0] == worker):
+                # A block with a hit may have been cut short, only fully searched blocks are done
+                del self.leases[block]
+                self.done.add(block)
+                if(self.checkpoint is not None):
+                    self.checkpoint.mark_done(block)
+                    if(time.time() - self.last_flush > coverage_map.FLUSH_INTERVAL):
+                        self.checkpoint.flush()     # A crashed coordinator loses at most FLUSH_INTERVAL seconds of leases
+                        self.last_flush = time.time()
+                if(len(self.done) == self.block_count):
+                    print("Key space exhausted.")
+                    self.finished.set()
+
+            return self.status() or {}
+
+    def handle(self, message: dict):
+        """ Dispatches one request of a worker. """
+        if(message["op"] == "hello"):
+            return self.config
+        if(message["op"] == "lease"):
+            return self.lease(message["worker"])
+        if(message["op"] == "heartbeat"):
+            return self.heartbeat(message["worker"])
+        if(message["op"] == "done"):
+            return self.complete(message["worker"], message["block"], message["seeds"])
+        return {"error": f"unknown op {message['op']}"}
+
+    def close(self):
+        if(self.checkpoint is not None):
+            self.checkpoint.flush()
+            self.checkpoint.close()
+
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """ Answers the requests of one worker connection, one JSON object per line. """
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = self.server.coordinator.handle(json.loads(line))
+            except (ValueError, KeyError) as e:
+                reply = {"error": str(e)}
+            self.wfile.write((json.dumps(reply) + "\n").encode())
+
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+
+def coordinate(constants, port: int, source, block_size: int = BLOCK_SIZE, backend: str = "numpy", batch_size: int = BATCH_SIZE,
+               checkpoint: str = None, host: str = ""):
+    """
+        Runs a coordinator until a seed is found or the key space is exhausted.
+
+        Args:
+            constants (dict): Dictionary containing "plaintext": bytes, "ciphertext": bytes , "nonce": bytes
+            port (int): TCP port to listen on
+            source, block_size, backend, batch_size, checkpoint: See Coordinator
+            host (str): Address to listen on, "" for every interface
+
+        Returns:
+            int: The found seed, -1 if no seed decrypts the ciphertext
+    """
+    coordinator = Coordinator(constants, source, block_size, backend, batch_size, checkpoint)
+    server = Server((host, port), RequestHandler)
+    server.coordinator = coordinator
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Coordinating {coordinator.block_count} blocks of {coordinator.block_size} candidates on port {port}.")
+
+    start_time = time.time()
+    try:
+        while not coordinator.finished.wait(10):
+            with coordinator.lock:
+                print(f"{len(coordinator.done)} of {coordinator.block_count} blocks searched, {len(coordinator.leases)} leased, "
+                      f"{len(coordinator.workers)} workers, {round(time.time() - start_time)} seconds.")
+        time.sleep(LINGER)      # Let every worker pick up the stop
+    except KeyboardInterrupt:
+        print("Interrupted!")
+
+    server.shutdown()
+    server.server_close()
+    coordinator.close()
+    return coordinator.seed
+
+
+
+class Connection:
+    def __init__(self, host: str, port: int):
+        """ Line based JSON connection to a coordinator. """
+        self.socket = socket.create_connection((host, port))
+        self.file = self.socket.makefile("rwb")
+
+    def request(self, message: dict):
+        """ Sends a request and returns the reply. Raises OSError once the coordinator is gone. """
+        self.file.write((json.dumps(message) + "\n").encode())
+        self.file.flush()
+        line = self.file.readline()
+        if(not line):
+            raise ConnectionError("Coordinator closed the connection.")
+        return json.loads(line)
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+
+
+def worker_process(host: str, port: int, worker: str, config: dict, stop_event):
+    """
+        One thread of a worker machine. Leases blocks and searches them until the coordinator reports the end of the search.
+
+        Args:
+            host, port: Address of the coordinator
+            worker (str): Name of the machine, leases are renewed per machine by the heartbeat of run_worker
+            config (dict): Reply of the coordinator to "hello"
+            stop_event (multiprocessing.Event): Set by the heartbeat once the search is over
+    """
+    constants = {name: bytes.fromhex(value) for name, value in config["constants"].items()}
+    source = candidates.from_description(config["source"])
+
+    try:
+        connection = Connection(host, port)
+        while not stop_event.is_set():
+            reply = connection.request({"op": "lease", "worker": worker})
+            if("stop" in reply):
+                break
+            if("wait" in reply):
+                stop_event.wait(reply["wait"])
+                continue
+
+            seeds = search_range(reply["start"], reply["end"], constants, stop_event, config["batch_size"], config["backend"], source)
+            if(stop_event.is_set() and len(seeds) == 0):
+                break       # Cut short, the lease expires on the coordinator
+            if("stop" in connection.request({"op": "done", "worker": worker, "block": reply["block"], "seeds": seeds})):
+                break
+        connection.close()
+
+    except (OSError, KeyboardInterrupt):
+        pass        # Coordinator gone or Ctrl-C, the unfinished lease expires and is searched by another worker
+
+    stop_event.set()
+
+
+
+def run_worker(host: str, port: int, thread_count: int = None):
+    """
+        Joins the search of a coordinator with thread_count processes and renews their leases until the search is over.
+
+        Args:
+            host (str): Address of the coordinator
+            port (int): Port of the coordinator
+            thread_count (int): Number of processes, None uses every core
+
+        Returns:
+            int: The seed reported by the coordinator, -1 if the search ended without one or the coordinator is unreachable
+    """
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    try:
+        connection = Connection(host, port)
+        config = connection.request({"op": "hello"})
+    except OSError as e:
+        print(f"Error! Could not reach the coordinator at {host}:{port}: {e}")
+        return -1
+
+    if(candidates.from_description(config["source"]) is None or config["backend"] not in BACKENDS):
+        print(f"Error! Unsupported search {config['source']} with backend {config['backend']}.")
+        return -1
+
+    stop_event = multiprocessing.Event()
+    processes = []
+    for _ in range(thread_count or os.cpu_count()):
+        p = multiprocessing.Process(target=worker_process, args=(host, port, worker, config, stop_event, ))
+        processes.append(p)
+        p.start()
+
+    # Heartbeat: renews the leases of every process and relays the end of the search
+    seed = -1
+    try:
+        while True:
+            alive = any(p.is_alive() for p in processes)
+            reply = connection.request({"op": "heartbeat", "worker": worker})
+            if("stop" in reply):
+                seed = reply["seed"]
+                break
+            if(not alive):
+                break
+            stop_event.wait(HEARTBEAT_INTERVAL)
+    except (OSError, KeyboardInterrupt):
+        pass
+
+    stop_event.set()
+
+    for p in processes:
+        p.join()
+    connection.close()
+    return seed
+
+
+
+if __name__ == "__main__":
+    try:
+        if(sys.argv[1] == "coordinator"):
+            with open(sys.argv[2], "r") as f:
+                victim = json.load(f)
+            constants = {"plaintext": victim["plaintext"].encode(), "nonce": bytes.fromhex(victim["nonce"]), "ciphertext": bytes.fromhex(victim["ciphertext"])}
+            max_key_length = int(sys.argv[4]) if len(sys.argv) > 4 else 31
+            enumeration = sys.argv[5] if len(sys.argv) > 5 else "linear"
+            checkpoint = sys.argv[6] if len(sys.argv) > 6 else None
+
+            seed = coordinate(constants, int(sys.argv[3]), candidates.make_candidates(enumeration, max_key_length), checkpoint=checkpoint)
+        else:
+            seed = run_worker(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]) if len(sys.argv) > 4 else None)
+
+        print("No seed found." if seed == -1 else f"Seed: {seed}")
+
+    except (IndexError, ValueError, OSError):
+        print("Error! Usage: py distributed.py coordinator <victim_file> <port> [max_key_length] [enumeration] [checkpoint]")
+        print("              py distributed.py worker <host> <port> [thread_count]")
@@ -2,9 +2,16 @@
 # CPSC 418 - Explorations of Pseudo Random Number Generation
 # April 2025
 
+import random
+import sys
+
 from Crypto.Cipher import ChaCha20
 
-class LCG:
+from jump_ahead import JumpAhead, check_jump
+
+
+
+class LCG(JumpAhead):
     def __init__(self, multiplier: int = 1103515245, increment: int = 12345, modulus: int = 2147483648, seed: int = 0):
         """ Initializes an LCG. Defaults to values used in the C rand function. """
         self.multiplier = multiplier
@@ -19,7 +26,7 @@ class LCG:
     def rand(self):
         self.state = ((self.multiplier * self.state) + self.increment) % self.modulus
         return self.state
-    
+
     def get_modulus(self):
         return self.modulus
 
@@ -71,3 +78,24 @@ def generate_key(lcg: LCG, length: int):
         result += keys[i]
 
     return result
+
+
+
+def random_lcg(trial: int):
+    """ The default LCG for trial 0, random parameters otherwise, with a random seed. Used by check_jump. """
+    if(trial == 0):
+        lcg = LCG()
+    else:
+        lcg = LCG(random.randrange(2**32), random.randrange(2**32), random.randrange(2, 2**64))
+    lcg.srand(random.randrange(2**64))
+    return lcg
+
+
+
+if __name__ == "__main__":
+    try:
+        trials = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+        if(check_jump(random_lcg, LCG.rand, trials)):
+            print(f"jump, at and split match rand in {trials} trials.")
+    except ValueError:
+        print("Error! Usage: py encrypt.py [trials]")
@@ -0,0 +1,112 @@
+# Group 7
+# CPSC 418 - Explorations of Pseudo Random Number Generation
+# April 2025
+
+import copy
+import random
+
+"""
+    Jump ahead for the LCGs of this project, x -> multiplier * x + increment mod modulus. It only uses the standard library, so
+    both encrypt.LCG and testing/lcg.LCG use it, testing/lcg.py adds this directory to its path for it.
+
+        jump_coefficients       (A, C) of steps LCG steps
+        JumpAhead               jump, at and split for a class with multiplier, increment, modulus and state
+        check_jump              compares JumpAhead with stepping one output at a time
+"""
+
+
+
+def jump_coefficients(multiplier: int, increment: int, modulus: int, steps: int):
+    """
+    Returns (A, C) with f^steps(x) = A * x + C mod modulus, computed by square and multiply on the affine map in O(log steps).
+
+    Args:
+        multiplier, increment, modulus (int): Parameters of the LCG
+        steps (int): Number of steps, at least 0
+    """
+    result_a, result_c = 1 % modulus, 0                 # Identity map
+    a, c = multiplier % modulus, increment % modulus    # f^1
+
+    while steps > 0:
+        if steps & 1:
+            result_a, result_c = (a * result_a) % modulus, (a * result_c + c) % modulus
+        a, c = (a * a) % modulus, (a * c + c) % modulus
+        steps >>= 1
+
+    return (result_a, result_c)
+
+
+
+class JumpAhead:
+    """ jump, at and split for an LCG class with multiplier, increment, modulus and state attributes. """
+
+    def jump(self, steps: int):
+        """ Advances the LCG by steps outputs in O(log steps). Returns the new state like a single step. """
+        self.state = self.at(steps)
+        return self.state
+
+    def at(self, index: int):
+        """ Returns the state after index outputs without changing the LCG, at(1) is the next output. """
+        if(index < 0):
+            print("Error! The LCG can only be advanced by a non negative number of steps.")
+            return -1
+        a, c = jump_coefficients(self.multiplier, self.increment, self.modulus, index)
+        return (a * self.state + c) % self.modulus
+
+    def split(self, count: int, length: int):
+        """
+        Splits the stream into count consecutive, non overlapping substreams of length outputs each.
+        Substream i returns the outputs i * length + 1 to (i + 1) * length of this LCG, so they can be generated in parallel.
+
+        Args:
+            count (int): Number of substreams
+            length (int): Outputs per substream
+
+        Returns:
+            list: count independent LCG objects, this LCG is not changed
+        """
+        streams = []
+        for i in range(count):
+            stream = copy.copy(self)
+            stream.jump(i * length)
+            streams.append(stream)
+        return streams
+
+
+
+def check_jump(new_lcg, step, trials: int = 100, max_steps: int = 5000):
+    """
+    Compares jump, at and split with stepping one output at a time for random LCGs and step counts.
+
+    Args:
+        new_lcg (function): Takes the trial number and returns a seeded JumpAhead LCG
+        step (function): Takes an LCG, advances it by one output and returns the output, e.g. LCG.rand
+        trials (int): Number of LCGs
+        max_steps (int): Steps are drawn from [0, max_steps)
+
+    Returns:
+        bool: True if every trial matched
+    """
+    for trial in range(trials):
+        lcg = new_lcg(trial)
+        steps = random.randrange(max_steps)
+
+        stepped = copy.copy(lcg)
+        outputs = [step(stepped) for _ in range(steps)]
+        expected = outputs[-1] if steps > 0 else lcg.state
+
+        if(lcg.at(steps) != expected or lcg.at(0) != lcg.state):
+            print(f"Error! at({steps}) does not match stepping for {vars(lcg)}.")
+            return False
+
+        count, length = 4, steps // 4
+        substreams = [[step(stream) for _ in range(length)] for stream in lcg.split(count, length)]
+        if(sum(substreams, []) != outputs[:count * length]):
+            print(f"Error! split({count}, {length}) does not match stepping for {vars(lcg)}.")
+            return False
+
+        if(lcg.jump(steps) != expected or lcg.state != stepped.state):
+            print(f"Error! jump({steps}) does not match stepping for {vars(lcg)}.")
+            return False
+
+    return True
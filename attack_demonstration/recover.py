@@ -0,0 +1,232 @@
+# Group 7
+# CPSC 418 - Explorations of Pseudo Random Number Generation
+# April 2025
+
+import math
+import sys
+import time
+
+"""
+    Recovers LCG states and seeds from observed output without searching the seed space.
+
+    Every output of an LCG is its whole state, so one output fixes every later output and, when the multiplier is invertible, every
+    earlier one too. The seed of a leaked key from encrypt.generate_key or of a bitstring from testing/lcg.LCG.generate_bits follows
+    from a single modular inversion. Unknown multipliers and increments (and moduli) follow from a few consecutive outputs.
+
+        recover_seed_from_key       seed of a key from encrypt.generate_key
+        recover_seed_from_bits      seed of a bitstring from testing/lcg.LCG.generate_bits (concatenated variable length bin() words)
+        recover_parameters          multiplier and increment from consecutive outputs with a known modulus
+        recover_modulus             modulus from consecutive outputs
+
+    Comparison with attack.brute_force: py recover.py [seed_bits]
+"""
+
+C_RAND = (1103515245, 12345, 2**31)                 # encrypt.LCG()
+TESTING_LCG = (1103515245, 12345, 2**31 - 1)        # testing/lcg.LCG(), the modulus is 2^31 - 1
+
+
+
+def solve_congruence(a: int, b: int, m: int):
+    """
+        Solves a * x = b mod m.
+
+        Returns:
+            list: Every solution in [0, m), empty if there is none. There are gcd(a, m) of them when one exists
+    """
+    g = math.gcd(a, m)
+    if(b % g != 0):
+        return []
+
+    reduced = m // g
+    x = (b // g) * pow(a // g, -1, reduced) % reduced if reduced > 1 else 0
+    return [x + k * reduced for k in range(g)]
+
+
+
+def previous_states(state: int, multiplier: int, increment: int, modulus: int):
+    """ Every state that steps to state, i.e. the solutions of multiplier * x + increment = state mod modulus. """
+    return solve_congruence(multiplier % modulus, (state - increment) % modulus, modulus)
+
+
+
+def recover_seed_from_key(key: bytes, multiplier: int = C_RAND[0], increment: int = C_RAND[1], modulus: int = C_RAND[2], word_bytes: int = None):
+    """
+        Recovers the seed of a key made by encrypt.generate_key. The first word of the key is the first output of rand, so the seed
+        is one inverse LCG step away. The other words are used to check the parameters.
+
+        Args:
+            key (bytes): The leaked key
+            multiplier, increment, modulus (int): Parameters of the victim's encrypt.LCG
+            word_bytes (int): Bytes per output. None uses modulus.bit_length() / 8 like generate_key
+
+        Returns:
+            list: Seeds in [0, modulus) that produce the key, one unless the multiplier shares a factor with the modulus.
+                Empty if the key did not come from this LCG
+    """
+    word_bytes = word_bytes or modulus.bit_length() // 8
+    words = [int.from_bytes(key[i:i + word_bytes], "big") for i in range(0, len(key), word_bytes)]
+
+    for previous, current in zip(words, words[1:]):
+        if((multiplier * previous + increment) % modulus != current):
+            return []
+    return previous_states(words[0], multiplier, increment, modulus)
+
+
+
+def parse_bits(bits: str, first: int, multiplier: int, increment: int, modulus: int):
+    """
+        Checks that bits is the output of testing/lcg.LCG.generate_bits whose first output is first.
+
+        Returns:
+            bool: True if every bit matches, the last word may be cut off
+    """
+    state = first
+    position = 0
+    while position < len(bits):
+        word = bin(state)[2:]
+        if(bits[position:position + len(word)] != word[:len(bits) - position]):
+            return False
+        position += len(word)
+        state = (multiplier * state + increment) % modulus
+    return True
+
+
+
+def recover_states_from_bits(bits: str, multiplier: int = TESTING_LCG[0], increment: int = TESTING_LCG[1], modulus: int = TESTING_LCG[2]):
+    """
+        Recovers the first output of testing/lcg.LCG.generate_bits. Outputs are written as bin() without leading zeros, so the
+        length of the first word is unknown. It is at most modulus.bit_length() and each length fixes every later word, so trying
+        every length and checking the rest of the string leaves the true first output (about two words remove every false one).
+
+        Args:
+            bits (str): Observed prefix of the bitstring
+            multiplier, increment, modulus (int): Parameters of the LCG (the actual modulus, 2^31 - 1 for testing/lcg.LCG())
+
+        Returns:
+            list: Candidate first outputs consistent with the whole prefix
+    """
+    candidates = []
+    for length in range(1, min(modulus.bit_length(), len(bits)) + 1):
+        first = int(bits[:length], 2)
+        if(bits[0] == "0" and length > 1):
+            break           # Only the output 0 is written with a leading zero
+        if(first < modulus and parse_bits(bits, first, multiplier, increment, modulus)):
+            candidates.append(first)
+    return candidates
+
+
+
+def recover_seed_from_bits(bits: str, multiplier: int = TESTING_LCG[0], increment: int = TESTING_LCG[1], modulus: int = TESTING_LCG[2],
+                           estimate: int = None):
+    """
+        Recovers the seed of a bitstring made by testing/lcg.LCG.generate_bits.
+
+        Args:
+            bits (str): Observed prefix of the bitstring
+            multiplier, increment, modulus (int): Parameters of the LCG
+            estimate (int): Rough value of the seed before seed() reduced it, e.g. the time in microseconds for seed_gen seeds.
+                The reduced seed is lifted to the value closest to it, which is exact if the estimate is within modulus / 2
+
+        Returns:
+            list: Candidate seeds, reduced modulo the modulus or lifted next to the estimate
+    """
+    seeds = []
+    for first in recover_states_from_bits(bits, multiplier, increment, modulus):
+        seeds += previous_states(first, multiplier, increment, modulus)
+
+    if(estimate is not None):
+        seeds = [seed + round((estimate - seed) / modulus) * modulus for seed in seeds]
+    return seeds
+
+
+
+def recover_parameters(outputs: list, modulus: int):
+    """
+        Recovers the multiplier and increment of an LCG with a known modulus from consecutive outputs. Since
+        x2 - x1 = a * (x1 - x0) mod m, the multiplier solves a linear congruence and c = x1 - a * x0. Three outputs suffice
+        when x1 - x0 is invertible, otherwise further outputs rule out the extra solutions.
+
+        Args:
+            outputs (list): At least three consecutive outputs (full states)
+            modulus (int): Modulus of the LCG
+
+        Returns:
+            list: Every (multiplier, increment) consistent with the outputs
+    """
+    if(len(outputs) < 3):
+        print("Error! At least three consecutive outputs are needed.")
+        return []
+
+    found = []
+    for multiplier in solve_congruence(outputs[1] - outputs[0], (outputs[2] - outputs[1]) % modulus, modulus):
+        increment = (outputs[1] - multiplier * outputs[0]) % modulus
+        if(all((multiplier * x + increment) % modulus == y for x, y in zip(outputs, outputs[1:]))):
+            found.append((multiplier, increment))
+    return found
+
+
+
+def recover_modulus(outputs: list):
+    """
+        Recovers an unknown modulus from consecutive outputs. With t_n = x_n+1 - x_n, every t_n+2 * t_n - t_n+1^2 is a multiple
+        of the modulus, so their gcd is the modulus once enough outputs (about six to ten) are known. The result can be a
+        multiple of the modulus if too few outputs are given.
+
+        Returns:
+            int: The modulus, 0 if fewer than four outputs are given
+    """
+    differences = [y - x for x, y in zip(outputs, outputs[1:])]
+    modulus = 0
+    for t0, t1, t2 in zip(differences, differences[1:], differences[2:]):
+        modulus = math.gcd(modulus, abs(t2 * t0 - t1 * t1))
+    return modulus
+
+
+
+def benchmark(seed_bits: int = 16):
+    """
+        Compares recovering the seed of a leaked key and of a bitstring with attack.brute_force over 2^seed_bits seeds.
+    """
+    import os
+    import secrets
+    from encrypt import LCG, generate_key, encrypt
+    from attack import brute_force
+
+    lcg = LCG()
+    seed = secrets.randbits(seed_bits)
+    lcg.srand(seed)
+    key = generate_key(lcg, 256)
+    nonce = os.urandom(8)
+    constants = {"plaintext": b"Hello There", "ciphertext": encrypt("Hello There", key, nonce), "nonce": nonce}
+
+    start_time = time.perf_counter()
+    recovered = recover_seed_from_key(key)
+    recover_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    found = brute_force(constants, None, seed_bits, backend="numpy", progress_interval=None)
+    brute_time = time.perf_counter() - start_time
+
+    print(f"Seed {seed}: recovered {recovered} in {recover_time * 1e6:.1f} us, brute force found {found} in {brute_time:.3f} s "
+          f"({brute_time / recover_time:.0f}x slower, the full 2^31 search scales that by 2^{31 - seed_bits})")
+
+    # Bitstring of the testing LCG seeded with the time, as seed_gen.seed_standard_rand and generate_numbers do
+    clock = int(time.time() * 1000000)
+    multiplier, increment, modulus = TESTING_LCG
+    state, bits = clock % modulus, ""
+    while len(bits) < 128:
+        state = (multiplier * state + increment) % modulus
+        bits += bin(state)[2:]
+
+    start_time = time.perf_counter()
+    recovered = recover_seed_from_bits(bits[:128], estimate=clock + 10**8)
+    recover_time = time.perf_counter() - start_time
+    print(f"Clock {clock}: recovered {recovered} from 128 bits in {recover_time * 1e6:.1f} us")
+
+
+
+if __name__ == "__main__":
+    try:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
+    except ValueError:
+        print("Error! Usage: py recover.py [seed_bits]")
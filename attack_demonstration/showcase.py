@@ -3,14 +3,17 @@
 # April 2025
 
 from Crypto.Cipher import ChaCha20
+import json
+import os
 import secrets
 import time
 
 from encrypt import LCG, generate_key, encrypt
 from attack import brute_force
+from candidates import TimeCandidates, RandTimeCandidates
 
 
-def example(plaintext: str, seed_bits: int = 32, thread_count: int = None):
+def example(plaintext: str, seed_bits: int = 32, thread_count: int = None, backend: str = "pycryptodome", enumeration: str = "linear", checkpoint: str = None):
     """
     Example showcasing how 256 bit keys generated with the C rand function (Linear Congruential Generation) is insecure against known plaintext attacks.
 
@@ -18,26 +21,49 @@ def example(plaintext: str, seed_bits: int = 32, thread_count: int = None):
         plaintext (str): The known plaintext
         seed_bits (int): rand supports seeds up to 2^31 but for testing purposes you can limit it to a different power of 2
         thread_count (int): Number of threads to be used during brute forcing. Reccommended is CPU count.
+        backend (str): Attack backend, one of attack.BACKENDS. "numpy" checks thousands of keys per ChaCha20 evaluation.
+        enumeration (str): Order the seeds are tried in, one of attack.ENUMERATIONS. "orbit" walks the LCG cycle and is meant for full 2^31 searches.
+        checkpoint (str): Path of a coverage map for brute_force. The victim is stored next to it (checkpoint + ".victim") so running 
+            the example again with the same checkpoint resumes the interrupted attack instead of starting a new one.
     
     """
     KEY_LENGTH = 256
     NONCE_LENGTH = 64
 
     lcg = LCG()
-    lcg.srand(secrets.randbits(seed_bits))       # Seed the lcg
+    victim_file = None if checkpoint is None else checkpoint + ".victim"
 
-    # Victim: Generate a key using the LCG and encrypt the message with it
-    key = generate_key(lcg, KEY_LENGTH)                         # Generate the key using the lcg
-    nonce = secrets.randbits(NONCE_LENGTH).to_bytes(8, "big")   # Generate a random nonce
-    ciphertext = encrypt(plaintext, key, nonce)
+    if(victim_file is not None and os.path.exists(victim_file)):
+        # Victim of the interrupted run
+        with open(victim_file, "r") as f:
+            victim = json.load(f)
+        plaintext = victim["plaintext"]
+        key, nonce, ciphertext = bytes.fromhex(victim["key"]), bytes.fromhex(victim["nonce"]), bytes.fromhex(victim["ciphertext"])
+
+    else:
+        lcg.srand(secrets.randbits(seed_bits))       # Seed the lcg
+
+        # Victim: Generate a key using the LCG and encrypt the message with it
+        key = generate_key(lcg, KEY_LENGTH)                         # Generate the key using the lcg
+        nonce = secrets.randbits(NONCE_LENGTH).to_bytes(8, "big")   # Generate a random nonce
+        ciphertext = encrypt(plaintext, key, nonce)
+
+        if(victim_file is not None):
+            with open(victim_file, "w") as f:
+                json.dump({"plaintext": plaintext, "key": key.hex(), "nonce": nonce.hex(), "ciphertext": ciphertext.hex()}, f)
 
     # Attacker: Use the known plaintext, ciphertext, and nonce to derive the initial seeding of the LCG
     constants = {"plaintext": plaintext.encode(), "ciphertext": ciphertext, "nonce": nonce}
     start_time = time.time()
-    found_seed = brute_force(constants=constants, thread_count=thread_count, max_key_length=seed_bits)     # Perform brute force
+    found_seed, stats = brute_force(constants=constants, thread_count=thread_count, max_key_length=seed_bits, backend=backend, enumeration=enumeration, 
+                                    checkpoint=checkpoint, return_stats=True)     # Perform brute force
     end_time = time.time()
     run_time = end_time - start_time
 
+    if(found_seed == -1):
+        print("No seed found.")
+        return
+
     # Attacker: Generate the key using the found seed
     lcg.srand(found_seed)
     found_key = generate_key(lcg, KEY_LENGTH)
@@ -45,11 +71,64 @@ def example(plaintext: str, seed_bits: int = 32, thread_count: int = None):
     decrypted_ciphertext = cipher.decrypt(ciphertext).decode()
 
     print(f"True Values: \n\tPlaintext: {plaintext} \n\tKey: {key.hex()} \n \tCiphertext: {ciphertext.hex()} \n")
-    print(f"Found Values: \n\tPlaintext: {decrypted_ciphertext} \n\tKey: {found_key.hex()} \n\tRuntime: {round(run_time, 2)} seconds \n\tSeeds Tried: {found_seed}")
+    print(f"Found Values: \n\tPlaintext: {decrypted_ciphertext} \n\tKey: {found_key.hex()} \n\tRuntime: {round(run_time, 2)} seconds \n\tSeed: {found_seed} \n\tKeys Tried: {stats.keys}")
+    print(f"Throughput: {stats}")
+
+
+
+def time_example(plaintext: str, window: int = 10, thread_count: int = None, backend: str = "numpy", rand: bool = False):
+    """
+    Example of a victim that seeds the LCG with the current time (see testing/seed_gen.py). The attacker only knows roughly when the
+    message was encrypted and tries the timestamps closest to that estimate first, so the seed is found without searching 2^31 seeds.
+
+    Args:
+        plaintext (str): The known plaintext
+        window (int): Seconds around the estimate that are searched
+        thread_count (int): Number of threads to be used during brute forcing
+        backend (str): Attack backend, one of attack.BACKENDS
+        rand (bool): Seed with the first output of rand() seeded with the time (seed_gen.seed_standard_rand) instead of the time itself
+    
+    """
+    KEY_LENGTH = 256
+    NONCE_LENGTH = 64
+
+    # Victim: Seed the lcg with the time in microseconds, optionally passed through one call of rand first
+    lcg = LCG()
+    clock = int(time.time() * 1000000)
+    if(rand):
+        lcg.srand((1103515245 * (clock % (2**31 - 1)) + 12345) % (2**31 - 1))     # testing/lcg.py LCG seeded with clock, gen()
+    else:
+        lcg.srand(clock)
+
+    key = generate_key(lcg, KEY_LENGTH)
+    nonce = secrets.randbits(NONCE_LENGTH).to_bytes(8, "big")
+    ciphertext = encrypt(plaintext, key, nonce)
+
+    # Attacker: The time the ciphertext was seen is a good estimate of the seed
+    time.sleep(0.5)
+    estimate = int(time.time() * 1000000)
+    source = RandTimeCandidates(estimate, window * 1000000) if rand else TimeCandidates(estimate, window * 1000000)
+
+    constants = {"plaintext": plaintext.encode(), "ciphertext": ciphertext, "nonce": nonce}
+    start_time = time.time()
+    found_seed = brute_force(constants=constants, thread_count=thread_count, max_key_length=31, backend=backend, source=source)
+    run_time = time.time() - start_time
+
+    if(found_seed == -1):
+        print("No seed found.")
+        return
+
+    lcg.srand(found_seed)
+    found_key = generate_key(lcg, KEY_LENGTH)
+    print(f"True Values: \n\tKey: {key.hex()} \n\tSeeding time: {clock} \n")
+    print(f"Found Values: \n\tKey: {found_key.hex()} \n\tSeed: {found_seed} \n\tRuntime: {round(run_time, 2)} seconds")
 
 
 if __name__ == "__main__":
     message = "Hello There"         # Any message works
     lcg_range = 24                  # The range of the intial LCG seed. Its maximum is 2^31 and that would be used in practice. But for testing faster set anything you like
     thread_count = 4                # The number of threads the simulation will create. Use your computers core count. I would reccommend 4 if you don't know.
-    example(message, lcg_range, thread_count)
+    backend = "pycryptodome"        # "pycryptodome" tries one key at a time, "numpy" runs ChaCha20 on thousands of keys at once and is much faster
+    enumeration = "linear"          # "linear" tries seeds 0, 1, 2, ..., "orbit" follows the LCG cycle so each key costs one LCG step (best when lcg_range is 31)
+    checkpoint = None               # Set to a file path (e.g. "attack.map") to be able to stop the attack with Ctrl-C and resume it later
+    example(message, lcg_range, thread_count, backend, enumeration, checkpoint)
@@ -10,39 +10,161 @@ Seed = x0 s.t. gcd(x0, n)=1
 Referenced: https://medium.com/@ntnprdhmm/how-to-generate-big-prime-numbers-miller-rabin-49e6e6af32fb
 '''
 
+import math
+import multiprocessing
+import os
 import random
 
+CHUNK_BITS = 2**23      # Default bits per block of BBS.chunks (1 MiB packed)
+SIEVE_LIMIT = 2**16     # Candidates with a prime factor below this are sieved out before any primality test
+SIEVE_WINDOW = 2**12    # Candidates p, p + 4, p + 8, ... sieved at once
+PACK_BITS = 2**13       # Steps generated at once by BBS.generate_packed
+ASCII_TABLE = bytes.maketrans(b"\x00\x01", b"01")
+
+def small_primes(limit):
+    """ Returns the odd primes below limit using the sieve of Eratosthenes. """
+    sieve = bytearray([1]) * limit
+    sieve[0:2] = b"\x00\x00"
+    for i in range(2, int(limit**0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return [i for i in range(3, limit) if sieve[i]]
+
+SMALL_PRIMES = small_primes(SIEVE_LIMIT)
+FOUR_INVERSES = [pow(4, -1, r) for r in SMALL_PRIMES]     # 4^-1 mod r for every small prime r, used by the sieve
+
 class BBS:
-    def __init__(self, bits=1024):
-        #1024 bits for NIST testing
-        self.p = self.generate_large_prime(bits)
-        self.q = self.generate_large_prime(bits)
+    def __init__(self, bits=1024, processes=1, p=None, q=None):
+        """
+        Generates p and q and m = p * q.
+
+        Args:
+            bits: Bits of p and q, 1024 for NIST testing
+            processes: Processes that search for p and q at the same time, 1 searches for them one after the other
+            p, q: Known Blum primes to use instead of generating new ones, e.g. from a modulus pool (see from_pool)
+        """
+        if p is not None and q is not None:
+            self.p, self.q = p, q
+        elif processes > 1:
+            self.p, self.q = self.generate_prime_pair(bits, processes)
+        else:
+            self.p = self.generate_large_prime(bits)
+            self.q = self.generate_large_prime(bits)
+            while self.q == self.p:
+                self.q = self.generate_large_prime(bits)
         self.m = self.p * self.q
+        self.q_inverse = pow(self.q, -1, self.p)   # For recombining residues mod p and mod q (see generate_bytes)
+
+    @classmethod
+    def from_pool(cls, bits=1024, path=None, reuse=False):
+        """
+        Creates a BBS from a precomputed (p, q) pair of a modulus pool (see modulus_pool.py), which takes milliseconds instead
+        of a prime search. Generates new primes if the pool has no pair of this size.
+
+        Args:
+            bits: Bits of p and q
+            path: Directory of the pool, None for modulus_pool.POOL_DIR
+            reuse: Allow pairs that were handed out before. By default every pair is used once
+        """
+        import modulus_pool
+        pair = modulus_pool.claim(bits, path or modulus_pool.POOL_DIR, reuse)
+        if pair is None:
+            print(f"Warning! The modulus pool has no {bits} bit pairs, generating new primes.")
+            return cls(bits)
+        return cls(bits, p=pair[0], q=pair[1])
 
     def get_m(self):
         return self.m
 
     def seed(self, seed):
         self.state = seed
+        self.x0 = seed      # Kept for seek
+
+    def at(self, steps):
+        """
+        Returns the state after steps squarings without changing the BBS. Since x^(p-1) ≡ 1 mod p, squaring steps times is
+        raising to 2^steps mod (p - 1) mod p (and likewise mod q, so 2^steps mod λ(m) overall). Both halves are recombined with
+        CRT, which takes a few modular exponentiations however large steps is.
+        """
+        if steps == 0:
+            return self.state
+        xp = pow(self.state % self.p, pow(2, steps, self.p - 1), self.p)
+        xq = pow(self.state % self.q, pow(2, steps, self.q - 1), self.q)
+        return xq + self.q * ((xp - xq) * self.q_inverse % self.p)
+
+    def jump(self, steps):
+        """ Advances the BBS by steps squarings at once (see at) and returns the new state. """
+        self.state = self.at(steps)
+        return self.state
+
+    def seek(self, position):
+        """ Moves to the state after position squarings of the seed, so the next step is step position + 1 of the stream. """
+        self.state = self.x0
+        return self.jump(position)
+
+    @staticmethod
+    def generate_large_prime(bits):
+        """
+        Generates a large prime p ≡ 3 mod 4 (a Blum prime) needed for BBS with the specified number of bits.
 
-    def generate_large_prime(self, bits):
-        """ Generates a large prime p ≡ 3 mod 4 (a Blum prime) needed for BBS with the specified number of bits. """
+        Instead of testing unrelated random numbers, candidates step by 4 from a random start so they all stay ≡ 3 mod 4.
+        A window of SIEVE_WINDOW candidates is sieved by every odd prime below SIEVE_LIMIT at once, which removes about 90% of
+        them with a few slice assignments. Survivors must pass a base 2 Fermat test, which is as expensive as one Miller-Rabin
+        round but rejects almost every remaining composite, before the full 20 rounds of is_prime.
+        """
         while True:
             p = random.getrandbits(bits) # Get number of bit length
             # Ensure the number is odd and has the correct bit length
             # 1. Set MSB (bit_length-1 position) to ensure correct size
             # 2. Set LSB to 1 to ensure odd (primes > 2 must be odd)
-            p |= (1 << bits - 1) | 1  
+            p |= (1 << bits - 1) | 1
 
             # Adjust to satisfy p ≡ 3 mod 4 condition:
             # BBS requires this for its security proof to hold
             if p % 4 != 3:
                 p += 2  # Next odd number (maintains oddness)
 
-            if self.is_prime(p):
-                return p
+            # Search windows of p + 4k until the candidates outgrow the bit length, then start over from a new random p
+            window = max(1, min(SIEVE_WINDOW, 2**bits // 64))
+            while (p + 4 * window).bit_length() == bits:
+                # candidates[k] is cleared if a small prime r divides p + 4k, i.e. k ≡ -p * 4^-1 mod r
+                candidates = bytearray([1]) * window
+                for r, inverse in zip(SMALL_PRIMES, FOUR_INVERSES):
+                    k = (-p * inverse) % r
+                    if p + 4 * k == r:
+                        k += r  # r itself is prime, only its multiples are not
+                    candidates[k::r] = bytes(len(range(k, window, r)))
+
+                for k in range(window):
+                    n = p + 4 * k
+                    if candidates[k] and pow(2, n - 1, n) == 1 and BBS.is_prime(n):
+                        return n
+                p += 4 * window
+
+    @staticmethod
+    def generate_prime_pair(bits, processes):
+        """
+        Searches for two distinct Blum primes with several processes, each running generate_large_prime from its own random start.
+        The two that finish first are used.
+
+        Returns:
+            tuple: (p, q)
+        """
+        primes = []
+        with multiprocessing.Pool(processes, initializer=random.seed) as pool:     # Reseed, forked processes share the random state
+            for prime in pool.imap_unordered(BBS.generate_large_prime, [bits] * processes):
+                if prime not in primes:
+                    primes.append(prime)
+                if len(primes) == 2:
+                    break
+        while len(primes) < 2:
+            prime = BBS.generate_large_prime(bits)
+            if prime not in primes:
+                primes.append(prime)
+        return tuple(primes)
 
-    def is_prime(self, n, k=20):
+    @staticmethod
+    def is_prime(n, k=20):
         """
         Probabilistic check if n is prime using Miller-Rabin.
 
@@ -93,13 +215,225 @@ class BBS:
         self.state = pow(self.state, 2, self.m)
         return self.state % 2
 
-    def generate_nist_output(self, num_bits=1_000_000):
+    def max_bits_per_step(self):
+        """ Largest number of low bits that can be taken from each squaring, floor(log2(log2(m))). 10 for a 2048 bit m. """
+        return int(math.log2(math.log2(self.m)))
+
+    def valid_bits_per_step(self, bits_per_step):
+        """ True if bits_per_step is between 1 and max_bits_per_step(), prints an error otherwise. """
+        if bits_per_step < 1 or bits_per_step > self.max_bits_per_step():
+            print(f"Error! bits_per_step must be between 1 and {self.max_bits_per_step()}.")
+            return False
+        return True
+
+    def generate_bytes(self, num_bits, crt=False, bits_per_step=1, ascii=False):
         """
-        Generate binary string for NIST testing.
+        Generates at least num_bits bits into a preallocated buffer of one byte per bit. With one bit per step this is num_bits
+        calls of next_bit.
 
-        Returns: '010101...' format (length = num_bits)
+        With crt the state is kept as its residues mod p and mod q, which are squared separately, and each output bit is
+        recombined with Garner's formula x = xq + q * h, h = (xp - xq) * q^-1 mod p. Only the low bits of x are needed, so
+        they are (xq + q * h) mod 2^bits_per_step, the parity (xq ^ h) & 1 for one bit, and x itself is only built once at
+        the end. The output and the final state are identical to squaring mod m. It is opt-in: the two half size squarings
+        and the recombination cost about as much as one squaring mod m, so it measures within a few percent of it.
+
+        Args:
+            num_bits: Number of bits
+            crt: Square the residues mod p and mod q instead of the state mod m
+            bits_per_step: Low bits of every squaring that are output, least significant bit first. At most max_bits_per_step()
+            ascii: Store ASCII '0' and '1' instead of the values 0 and 1
+
+        Returns:
+            bytearray: One byte per bit, for whole steps only, so num_bits rounded up to a multiple of bits_per_step.
+                None if bits_per_step is out of range
         """
-        bits = []
-        for _ in range(num_bits):
-            bits.append(str(self.next_bit()))
-        return ''.join(bits)
+        if not self.valid_bits_per_step(bits_per_step):
+            return None
+
+        steps = -(-num_bits // bits_per_step)
+        bits = bytearray(steps * bits_per_step)
+        if steps == 0:
+            return bits
+        base = 48 if ascii else 0   # 48 is ASCII '0'
+
+        if bits_per_step == 1:
+            if crt:
+                p, q, q_inverse = self.p, self.q, self.q_inverse
+                xp, xq = self.state % p, self.state % q
+                for i in range(steps):
+                    xp = xp * xp % p
+                    xq = xq * xq % q
+                    h = (xp - xq) * q_inverse % p
+                    bits[i] = base | ((xq ^ h) & 1)
+                self.state = xq + q * h
+            else:
+                x, m = self.state, self.m
+                for i in range(steps):
+                    x = x * x % m
+                    bits[i] = base | (x & 1)
+                self.state = x
+            return bits
+
+        # Bytes of the low bits of a step, least significant bit first
+        mask = (1 << bits_per_step) - 1
+        table = [bytes(base | ((v >> k) & 1) for k in range(bits_per_step)) for v in range(mask + 1)]
+        if crt:
+            p, q, q_inverse = self.p, self.q, self.q_inverse
+            q_low = q & mask
+            xp, xq = self.state % p, self.state % q
+            for i in range(0, len(bits), bits_per_step):
+                xp = xp * xp % p
+                xq = xq * xq % q
+                h = (xp - xq) * q_inverse % p
+                bits[i:i + bits_per_step] = table[(xq + q_low * h) & mask]
+            self.state = xq + q * h
+        else:
+            x, m = self.state, self.m
+            for i in range(0, len(bits), bits_per_step):
+                x = x * x % m
+                bits[i:i + bits_per_step] = table[x & mask]
+            self.state = x
+        return bits
+
+    def generate_packed(self, num_bits, crt=False, bits_per_step=1):
+        """
+        Generates num_bits bits packed 8 per byte, most significant bit first, with the last byte padded with zeros. The packed
+        buffer is preallocated and filled PACK_BITS bits at a time, so only a few KB are needed besides it.
+
+        Returns:
+            bytearray: (num_bits + 7) // 8 bytes, None if bits_per_step is out of range
+        """
+        if not self.valid_bits_per_step(bits_per_step):
+            return None
+
+        packed = bytearray(-(-num_bits // 8))
+        block = PACK_BITS * bits_per_step       # Whole bytes and whole steps, so no bits are carried between blocks
+        for start in range(0, num_bits, block):
+            count = min(block, num_bits - start)
+            padding = -count % 8
+            bits = self.generate_bytes(count, crt, bits_per_step, ascii=True)[:count]
+            packed[start // 8:(start + count + padding) // 8] = (int(bits, 2) << padding).to_bytes((count + padding) // 8, "big")
+        return packed
+
+    @staticmethod
+    def to_ascii(bits):
+        """ ASCII view '0101...' of a buffer of one byte per bit from generate_bytes. """
+        return bits.translate(ASCII_TABLE).decode("ascii")
+
+    def generate_nist_output(self, num_bits=1_000_000, crt=False, bits_per_step=1, output="ascii"):
+        """
+        Generate binary string for NIST testing. See generate_bytes for crt and bits_per_step. Bits of the last step past
+        num_bits are dropped.
+
+        Args:
+            output: "ascii" for the '0101...' string, "bytes" for a bytearray of one 0 or 1 byte per bit, "packed" for a
+                bytearray of 8 bits per byte, most significant bit first (see generate_packed)
+
+        Returns: '010101...' format (length = num_bits) or the buffer of the output mode, None if bits_per_step is out of range
+        """
+        if output == "packed":
+            return self.generate_packed(num_bits, crt, bits_per_step)
+
+        bits = self.generate_bytes(num_bits, crt, bits_per_step, ascii=(output == "ascii"))
+        if bits is None:
+            return None
+        del bits[num_bits:]     # In place, no copy of the buffer
+        return bits.decode("ascii") if output == "ascii" else bits
+
+    def segments(self, bitcount, segment_bits, bits_per_step=1, processes=None):
+        """
+        Yields the next bitcount bits as ASCII segments of segment_bits bits, in order. Every segment is generated by its own
+        process from its own jump point (see at), so the work is spread over every core, and the segments joined together are
+        identical to generate_nist_output(bitcount). The BBS is left at the state the sequential output would leave.
+
+        Args:
+            bitcount (int): Total number of bits
+            segment_bits (int): Bits per segment, the last one is shorter if bitcount is not a multiple of it
+            bits_per_step (int): Low bits output per squaring, see generate_bytes
+            processes (int): Processes that generate segments, None for every core
+
+        Yields:
+            bytearray: One ASCII '0' or '1' per bit
+        """
+        if not self.valid_bits_per_step(bits_per_step):
+            return
+
+        tasks = [(self.p, self.q, self.state, start, min(segment_bits, bitcount - start), bits_per_step) for start in range(0, bitcount, segment_bits)]
+        self.jump(-(-bitcount // bits_per_step))
+        with multiprocessing.Pool(processes) as pool:
+            for segment in pool.imap(generate_segment, tasks):
+                yield segment
+
+    def generate_parallel(self, num_bits=1_000_000, processes=None, bits_per_step=1):
+        """
+        Parallel version of generate_nist_output with one contiguous segment per process, see segments.
+
+        Returns: '010101...' format (length = num_bits), None if bits_per_step is out of range
+        """
+        processes = processes or os.cpu_count()
+        segment_bits = max(1, -(-num_bits // processes))
+        bits = bytearray()
+        for segment in self.segments(num_bits, segment_bits, bits_per_step, processes):
+            bits += segment
+        return bits.decode("ascii") if len(bits) == num_bits else None
+
+    def chunks(self, bitcount=None, chunk_bits=CHUNK_BITS, bits_per_step=1, processes=1):
+        """
+        Yields the bits of generate_nist_output as packed blocks of chunk_bits bits, most significant bit first.
+        Each block continues exactly where the previous one ended, a step split between two blocks included, so memory stays
+        constant however long the sequence is.
+
+        Args:
+            bitcount (int): Total number of bits, None for an endless stream
+            chunk_bits (int): Bits per block, a multiple of 8. The last block is shorter if bitcount is not a multiple of it
+            bits_per_step (int): Low bits output per squaring, see generate_bytes
+            processes (int): Generate blocks in parallel with this many processes (see segments), None for every core. Needs a
+                bitcount, and blocks are made smaller than chunk_bits if needed so every process gets one
+
+        Yields:
+            bytes: Packed block, the last byte of a short final block is padded with zeros
+        """
+        if chunk_bits % 8 != 0:
+            print("Error! chunk_bits must be a multiple of 8.")
+            return
+        if not self.valid_bits_per_step(bits_per_step):
+            return
+
+        if processes != 1 and bitcount is not None:
+            # Blocks shrink so every process gets at least one, rounded to whole bytes
+            segment_bits = max(8, min(chunk_bits, -(-bitcount // (8 * (processes or os.cpu_count()))) * 8))
+            for bits in self.segments(bitcount, segment_bits, bits_per_step, processes):
+                padding = -len(bits) % 8
+                yield (int(bits, 2) << padding).to_bytes((len(bits) + padding) // 8, "big")
+            return
+
+        pending = bytearray()   # Bits of the last step that did not fit into the previous block
+        produced = 0
+        while bitcount is None or produced < bitcount:
+            block = chunk_bits if bitcount is None else min(chunk_bits, bitcount - produced)
+            bits = pending + self.generate_bytes(block - len(pending), False, bits_per_step, ascii=True)
+            bits, pending = bits[:block], bits[block:]
+            padding = -block % 8    # Zeros after a partial last byte
+            packed = (int(bits, 2) << padding).to_bytes((block + padding) // 8, "big")
+            produced += block
+            yield packed
+
+
+
+def generate_segment(task):
+    """
+    Generates one segment for BBS.segments in a worker process.
+
+    Args:
+        task: (p, q, state, start, count, bits_per_step), the segment is bits start to start + count - 1 of the stream that
+            continues from state
+
+    Returns:
+        bytearray: One ASCII '0' or '1' per bit
+    """
+    p, q, state, start, count, bits_per_step = task
+    bbs = BBS(p=p, q=q)
+    bbs.state = state
+    step, offset = divmod(start, bits_per_step)     # A segment can start in the middle of a step
+    bbs.jump(step)
+    return bbs.generate_bytes(offset + count, False, bits_per_step, ascii=True)[offset:offset + count]
@@ -5,9 +5,16 @@
 from lcg import *
 from bbs import *
 from seed_gen import *
+from sequence_file import write_sequence, EXTENSION
+from manifest import write_manifest
 
+import multiprocessing
 import os
+import random
 import sys
+import time
+
+import numpy
 
 """ 
     The goal of this file is to generate testing data for BBS and LCG using the same input seeds. See seed_gen.py for seed generation.
@@ -28,19 +35,173 @@ import sys
             - Generate LCG (bool): A flag which determines if LCG data will be generated. Either True, or False
                 - If you generate LCG data and BBS data the shared seed must adhere to the seeding constraints (see seed_gen.py)
                 - If you generate LCG without BBS data the seed used will not adhere to BBS seeding constraings (see seed_gen.py)
+            - Bit count (int, optional): The number of bits in each file, 1 million by default. Files are streamed to disk in blocks, so
+              sequences of 10^9 bits or more can be generated with constant memory.
+            - pool (optional): Take the BBS primes from the modulus pool (see modulus_pool.py) instead of generating new ones for every triplet.
+            - bits_per_step <n> (optional): Output the n low bits of every BBS squaring, least significant first, for up to n times the throughput.
+            - processes <n> (optional): Generate each BBS file in n contiguous segments at once, each from its own jump point (see BBS.seek).
+            - --workers <n> (optional): Generate n whole triplets at once, one per process, each with its own BBS. Best for large campaigns.
+            - binary (optional): Write packed .bits files (see sequence_file.py) instead of ASCII .txt files, 8 times smaller.
+            - manifest (optional): Only write manifest.json with the generator, parameters and seed of every file, which are regenerated
+              when they are needed (see manifest.py). A few hundred bytes per file instead of the bits.
 
         3. If you are using an LCG you can then choose to either use the C rand function parameters or specify your own.
             
         4. You can also generate the LCG number using only the LSB of each output, or the entire number.
 
         5. The generated pseudo random numbers will be stored within the specified directory. 
-            - Each file contains a single number of 1 million bits in ASCII form
+            - Each file contains a single number of 1 million bits (or the given bit count) in ASCII form, or packed with its generator, seed and checksum with binary
             - The LCG and BBS file which use the same seed will have the same leading number and same seed postfix. Example: 0_bbs_rand.txt uses the same seed as 0_lcg_rand.txt
 """
 
 
 
-def get_data(file_count, path, gen_bbs, gen_lcg, lcg_params=None, lsb=False):
+def write_chunks(fname, chunks, bit_count):
+    """
+        Writes a bit sequence to a file in ASCII, one packed block at a time, so only one block is held in memory.
+        The bits go to fname.tmp first, which is renamed to fname at the end.
+
+        Args:
+            fname (str): Path of the new file.
+            chunks (iterator): Packed blocks from LCG.chunks or BBS.chunks, most significant bit first.
+            bit_count (int): Total number of bits in the blocks, the padding of the last block is not written.
+    """
+    with open(fname + ".tmp", "w") as f:
+        written = 0
+        for block in chunks:
+            bits = numpy.unpackbits(numpy.frombuffer(block, dtype=numpy.uint8))[:bit_count - written]
+            f.write((bits + ord("0")).tobytes().decode("ascii"))
+            written += len(bits)
+    os.replace(fname + ".tmp", fname)      # A file only appears once it is complete, even if generation is interrupted
+
+
+
+def write_output(fname, chunks, bit_count, binary, metadata, manifest=False):
+    """
+        Writes a bit sequence as fname.txt with write_chunks, or as a packed fname.bits file with its metadata (see sequence_file.py).
+
+        Args:
+            fname (str): Path of the new file without its extension.
+            chunks (iterator): Packed blocks from LCG.chunks or BBS.chunks, most significant bit first.
+            bit_count (int): Total number of bits in the blocks.
+            binary (bool): Write a .bits file instead of a .txt file.
+            metadata (dict): generator, params, seed_type and seed of the sequence, only written to .bits files.
+            manifest (bool): Write nothing, the sequence is regenerated from its manifest entry when needed (see manifest.py).
+
+        Returns:
+            dict: The manifest entry of the sequence.
+    """
+    entry = dict(metadata, name=os.path.basename(fname), length=bit_count)
+    if(manifest):
+        return entry
+
+    if(binary):
+        write_sequence(fname + EXTENSION, chunks, bit_count, metadata)
+    else:
+        write_chunks(fname + ".txt", chunks, bit_count)
+    return entry
+
+
+
+def generate_triplet(iteration, new_dir, options):
+    """
+        Generates the files of one triplet: a new BBS, its 3 seeds, and the BBS and LCG numbers of each seed.
+
+        Args:
+            iteration (int): Number of the triplet, the leading number of its file names.
+            new_dir (str): Directory of the files.
+            options (dict): The generation arguments of get_data (gen_bbs, gen_lcg, lcg_params, lsb, bit_count, use_pool, bits_per_step, bbs_processes, binary, manifest).
+
+        Returns:
+            tuple: (iteration, list of the manifest entries of its files), once every file is written.
+    """
+    gen_bbs, gen_lcg, lcg_params, lsb = options["gen_bbs"], options["gen_lcg"], options["lcg_params"], options["lsb"]
+    bit_count, bits_per_step, bbs_processes, binary = options["bit_count"], options["bits_per_step"], options["bbs_processes"], options["binary"]
+    manifest = options["manifest"]
+    entries = []
+
+    fname_template = new_dir + "/" + str(iteration) + "_"   # ./MAIN_DIR/path/iteration_
+
+    bbs = BBS.from_pool() if options["use_pool"] else BBS()
+    m = bbs.get_m()
+
+    # Generate valid seeds
+    s_urand = seed_bbs_urand(m)             # Use BBS seeds for both BBS and LCG
+    s_rand = seed_bbs_rand(m)
+    s_time = seed_bbs_time(m)
+
+    ##################################
+    #       BBS Data Generation
+    ##################################
+    if(gen_bbs):
+        params = {"p": bbs.p, "q": bbs.q, "bits_per_step": bits_per_step}     # m = p * q
+
+        # urand
+        bbs.seed(s_urand)
+        fname = fname_template + "bbs_urand"    # Final path = ./MAIN_DIR/path/iteration_bbs_urand.txt
+        entries.append(write_output(fname, bbs.chunks(bit_count, bits_per_step=bits_per_step, processes=bbs_processes), bit_count, binary,
+                                    {"generator": "bbs", "params": params, "seed_type": "urand", "seed": s_urand}, manifest))
+
+        # rand
+        bbs.seed(s_rand)
+        fname = fname_template + "bbs_rand"     # Final path = ./MAIN_DIR/path/iteration_bbs_rand.txt
+        entries.append(write_output(fname, bbs.chunks(bit_count, bits_per_step=bits_per_step, processes=bbs_processes), bit_count, binary,
+                                    {"generator": "bbs", "params": params, "seed_type": "rand", "seed": s_rand}, manifest))
+
+        # time
+        bbs.seed(s_time)
+        fname = fname_template + "bbs_time"     # Final path = ./MAIN_DIR/path/iteration_bbs_time.txt
+        entries.append(write_output(fname, bbs.chunks(bit_count, bits_per_step=bits_per_step, processes=bbs_processes), bit_count, binary,
+                                    {"generator": "bbs", "params": params, "seed_type": "time", "seed": s_time}, manifest))
+
+    ##################################
+    #       LCG Data Generation
+    ##################################
+    if(gen_lcg):
+        if(lcg_params == None):
+            lcg = LCG()
+        else:
+            lcg = LCG(lcg_params[0], lcg_params[1], lcg_params[2])
+        
+        params = {"multiplier": lcg.multiplier, "increment": lcg.increment, "modulus": lcg.modulus, "lsb": lsb}
+
+        # urand
+        lcg.seed(s_urand)
+        fname = fname_template + "lcg_urand"    # Final path = ./MAIN_DIR/path/iteration_lcg_urand.txt
+        entries.append(write_output(fname, lcg.chunks(bit_count, lsb=lsb), bit_count, binary,
+                                    {"generator": "lcg", "params": params, "seed_type": "urand", "seed": s_urand}, manifest))
+
+        # rand
+        lcg.seed(s_rand)
+        fname = fname_template + "lcg_rand"    # Final path = ./MAIN_DIR/path/iteration_lcg_rand.txt 
+        entries.append(write_output(fname, lcg.chunks(bit_count, lsb=lsb), bit_count, binary,
+                                    {"generator": "lcg", "params": params, "seed_type": "rand", "seed": s_rand}, manifest))
+
+        # time
+        lcg.seed(s_time)
+        fname = fname_template + "lcg_time"    # Final path = ./MAIN_DIR/path/iteration_lcg_time.txt 
+        entries.append(write_output(fname, lcg.chunks(bit_count, lsb=lsb), bit_count, binary,
+                                    {"generator": "lcg", "params": params, "seed_type": "time", "seed": s_time}, manifest))
+
+    return iteration, entries
+
+
+
+def print_progress(iteration, done, total, start_time):
+    """ Prints one progress line after a triplet is finished, with the time left if the rest takes as long on average. """
+    elapsed = time.time() - start_time
+    eta = elapsed / done * (total - done)
+    print(f"Triplet {iteration} done ({done}/{total}), {round(elapsed, 1)} s elapsed, about {round(eta, 1)} s left.")
+
+
+
+def generate_triplet_task(task):
+    """ generate_triplet for Pool.imap_unordered, which passes one argument. """
+    return generate_triplet(*task)
+
+
+
+def get_data(file_count, path, gen_bbs, gen_lcg, lcg_params=None, lsb=False, bit_count=1_000_000, use_pool=False, bits_per_step=1, bbs_processes=1, workers=1, binary=False, manifest=False):
 
     """
         Generates test data for both BBS and LCG and saves the data at the specified path.
@@ -51,6 +212,14 @@ def get_data(file_count, path, gen_bbs, gen_lcg, lcg_params=None, lsb=False):
             gen_bbs (bool): True: Generate BBS numbers, False: Do not generate BBS numbers.
             gen_lcg (bool): True: Generate LCG numbers, False: Do not generate LCG numbers.
             lcg_params (tuple): Contains (multiplier, increment, modulus) where modulus is the power of two, not the literal number. Uses C rand by default.
+            lsb (bool): True: Each LCG bit is the LSB of one output, False: LCG outputs are concatenated.
+            bit_count (int): Number of bits in each file. Files are written in blocks, so 10^9 bits or more only need constant memory.
+            use_pool (bool): Take the BBS primes from the modulus pool (see modulus_pool.py) instead of generating them for every triplet.
+            bits_per_step (int): Low bits BBS outputs per squaring, least significant first. Up to 10 for 1024 bit primes (see BBS.generate_bytes).
+            bbs_processes (int): Processes that generate each BBS file in parallel segments (see BBS.segments), None for every core.
+            workers (int): Processes that generate whole triplets at once. File names do not depend on the order they finish in.
+            binary (bool): Write packed .bits files with their generator, seed and checksum instead of ASCII .txt files (see sequence_file.py).
+            manifest (bool): Only write new_dir/manifest.json, from which every file is regenerated on demand (see manifest.py).
     
     """
 
@@ -64,86 +233,28 @@ def get_data(file_count, path, gen_bbs, gen_lcg, lcg_params=None, lsb=False):
         print("Error creating directory!")
         return -1
 
-    for iteration in range(file_count):
-        fname_template = MAIN_DIR + "/" + path + "/" + str(iteration) + "_" # ./MAIN_DIR/path/iteration_
-
-        bbs = BBS()
-        m = bbs.get_m()
-
-        # Generate valid seeds
-        s_urand = seed_bbs_urand(m)             # Use BBS seeds for both BBS and LCG
-        s_rand = seed_bbs_rand(m)
-        s_time = seed_bbs_time(m)
-
-        ##################################
-        #       BBS Data Generation
-        ##################################
-        if(gen_bbs):
-            # urand
-            bbs.seed(s_urand)
-            data = bbs.generate_nist_output(1_000_000)
-            fname = fname_template + "bbs_urand.txt"    # Final path = ./MAIN_DIR/path/iteration_bbs_urand.txt
-
-            with open(f"{fname}", "w") as f:
-                f.write(data)
-
-            # rand
-            bbs.seed(s_rand)
-            data = bbs.generate_nist_output(1_000_000)
-            fname = fname_template + "bbs_rand.txt"     # Final path = ./MAIN_DIR/path/iteration_bbs_rand.txt
-
-            with open(f"{fname}", "w") as f:
-                f.write(data)
-
-            # time
-            bbs.seed(s_time)
-            data = bbs.generate_nist_output(1_000_000)
-            fname = fname_template + "bbs_time.txt"     # Final path = ./MAIN_DIR/path/iteration_bbs_time.txt
-
-            with open(f"{fname}", "w") as f:
-                f.write(data)
-
-        ##################################
-        #       LCG Data Generation
-        ##################################
-        if(gen_lcg):
-            if(lcg_params == None):
-                lcg = LCG()
-            else:
-                lcg = LCG(lcg_params[0], lcg_params[1], lcg_params[2])
-            
-            # urand
-            lcg.seed(s_urand)
-            if(lsb):
-                data = lcg.generate_bits_lsb(1_000_000)
-            else:
-                data = lcg.generate_bits(1_000_000)
-            fname = fname_template + "lcg_urand.txt"    # Final path = ./MAIN_DIR/path/iteration_lcg_urand.txt
-
-            with open(f"{fname}", "w") as f:
-                f.write(data)
-
-            # rand
-            lcg.seed(s_rand)
-            if(lsb):
-                data = lcg.generate_bits_lsb(1_000_000)
-            else:
-                data = lcg.generate_bits(1_000_000)
-            fname = fname_template + "lcg_rand.txt"    # Final path = ./MAIN_DIR/path/iteration_lcg_rand.txt 
+    options = {"gen_bbs": gen_bbs, "gen_lcg": gen_lcg, "lcg_params": lcg_params, "lsb": lsb, "bit_count": bit_count,
+               "use_pool": use_pool, "bits_per_step": bits_per_step, "bbs_processes": bbs_processes, "binary": binary, "manifest": manifest}
 
-            with open(f"{fname}", "w") as f:
-                f.write(data)
+    entries = []
+    start_time = time.time()
+    if(workers > 1):
+        options["bbs_processes"] = 1    # Pool workers cannot start processes of their own
+        with multiprocessing.Pool(workers, initializer=random.seed) as pool:     # Reseed, forked workers share the random state of BBS primes
+            tasks = [(iteration, new_dir, options) for iteration in range(file_count)]
+            for done, (iteration, triplet) in enumerate(pool.imap_unordered(generate_triplet_task, tasks), 1):
+                entries += triplet
+                print_progress(iteration, done, file_count, start_time)
+    else:
+        for iteration in range(file_count):
+            entries += generate_triplet(iteration, new_dir, options)[1]
+            print_progress(iteration, iteration + 1, file_count, start_time)
 
-            # time
-            lcg.seed(s_time)
-            if(lsb):
-                data = lcg.generate_bits_lsb(1_000_000)
-            else:
-                data = lcg.generate_bits(1_000_000)
-            fname = fname_template + "lcg_time.txt"    # Final path = ./MAIN_DIR/path/iteration_lcg_time.txt 
+    if(manifest):
+        write_manifest(new_dir, entries)
 
-            with open(f"{fname}", "w") as f:
-                f.write(data)
+    elapsed = time.time() - start_time
+    print(f"Generated {file_count} triplets in {round(elapsed, 2)} seconds ({round(file_count / elapsed, 3) if elapsed > 0 else 0} triplets/s) with {workers} worker(s).")
 
 
 
@@ -152,6 +263,8 @@ if __name__ == "__main__":
         # Store command line arguments
         gen_bbs = (sys.argv[3] == "true" or sys.argv[3] == "True")
         gen_lcg = (sys.argv[4] == "true" or sys.argv[4] == "True")
+        lcg_params = None
+        lsb = False
 
         if(gen_lcg):
             while True:
@@ -173,7 +286,14 @@ if __name__ == "__main__":
                     print("Error, provide valid inputs.")
                     continue
 
-        get_data(int(sys.argv[1]), sys.argv[2], gen_bbs, gen_lcg, lcg_params, lsb)
+        bit_count = int(sys.argv[5]) if len(sys.argv) > 5 else 1_000_000
+        use_pool = "pool" in sys.argv[6:]
+        bits_per_step = int(sys.argv[sys.argv.index("bits_per_step") + 1]) if "bits_per_step" in sys.argv[6:] else 1
+        bbs_processes = int(sys.argv[sys.argv.index("processes") + 1]) if "processes" in sys.argv[6:] else 1
+        workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv[6:] else 1
+        binary = "binary" in sys.argv[6:]
+        manifest = "manifest" in sys.argv[6:]
+        get_data(int(sys.argv[1]), sys.argv[2], gen_bbs, gen_lcg, lcg_params, lsb, bit_count, use_pool, bits_per_step, bbs_processes, workers, binary, manifest)
 
     except Exception as e:
         print("Error! Call script with 4 arguments: file_count, dir_name, gen_bbs, gen_lcg.")
@@ -181,5 +301,12 @@ if __name__ == "__main__":
         print("\tdir_name (string): The name of the NEW directory in ./test_data where this data will be stored.")
         print("\tgen_bbs (bool): If BBS test data will be generated. Either false, or true.")
         print("\tgen_lcg (bool): If LCG test data will be generated. Either false, or true.")
+        print("\tbit_count (int, optional): Number of bits in each file. Defaults to 1000000.")
+        print("\tpool (optional): Take BBS primes from the modulus pool filled by modulus_pool.py.")
+        print("\tbits_per_step <n> (optional): Output the n low bits of every BBS squaring instead of 1.")
+        print("\tprocesses <n> (optional): Generate each BBS file with n processes.")
+        print("\t--workers <n> (optional): Generate n triplets at once, one per process.")
+        print("\tbinary (optional): Write packed .bits files instead of ASCII .txt files.")
+        print("\tmanifest (optional): Only write a manifest, files are regenerated on demand with manifest.py.")
         print(f"\n {e}")
 
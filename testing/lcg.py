@@ -2,7 +2,21 @@
 # CPSC 418 - Explorations of Pseudo Random Number Generation
 # April 2025
 
-class LCG:
+import os
+import random
+import sys
+
+import numpy
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "attack_demonstration"))
+from jump_ahead import JumpAhead, jump_coefficients, check_jump      # Shared with encrypt.LCG, standard library only
+
+BULK_CHUNK = 2**20          # Outputs converted to bits at once by the bulk methods
+CHUNK_BITS = 2**23          # Default bits per block of LCG.chunks (1 MiB packed)
+
+
+
+class LCG(JumpAhead):
     def __init__(self, multiplier=1103515245, increment=12345, modulus=31):
         self.state = 1
         self.multiplier = multiplier
@@ -16,6 +30,119 @@ class LCG:
         self.state = (self.multiplier * self.state + self.increment) % self.modulus
         return self.state
 
+    def generate_array(self, count):
+        """
+            Returns the next count outputs of gen as a numpy array and advances the LCG past them, like calling gen count times.
+            The array is filled by doubling: once the first n outputs are known, the next n are A_n * x + C_n of them (see
+            jump_coefficients), so it takes O(log count) numpy operations. Moduli above 2^32 would overflow uint64 and use gen.
+
+            Returns:
+                numpy.ndarray: uint64 outputs, object dtype for moduli above 2^32
+        """
+        if(self.modulus > 2**32):
+            return numpy.array([self.gen() for _ in range(count)], dtype=object)
+
+        outputs = numpy.empty(count, dtype=numpy.uint64)
+        if(count == 0):
+            return outputs
+
+        outputs[0] = self.at(1)
+        filled = 1
+        while filled < count:
+            n = min(filled, count - filled)
+            a, c = jump_coefficients(self.multiplier, self.increment, self.modulus, filled)
+            outputs[filled:filled + n] = (numpy.uint64(a) * outputs[:n] + numpy.uint64(c)) % numpy.uint64(self.modulus)
+            filled += n
+
+        self.state = int(outputs[-1])
+        return outputs
+
+    def generate_word_bits(self, bitcount):
+        """
+            Returns the bits of generate_bits as a numpy uint8 array of 0s and 1s without cutting off the last output, so it can
+            be more than bitcount bits long. Stops after the output that reaches bitcount bits, like generate_bits.
+        """
+        if(self.modulus > 2**32):
+            bits = ""
+            while len(bits) < bitcount:
+                bits += bin(self.gen())[2:]
+            return numpy.frombuffer(bits.encode(), dtype=numpy.uint8) - ord("0")
+
+        # Every output is written as bin() without leading zeros, so words are max(bit_length, 1) bits long
+        width = self.modulus.bit_length()
+        columns = numpy.arange(32)
+        chunks = []
+        needed = bitcount
+        while needed > 0:
+            outputs = self.generate_array(min(BULK_CHUNK, needed // width + 1))
+            lengths = numpy.maximum(numpy.frexp(outputs.astype(numpy.float64))[1], 1)
+            ends = numpy.cumsum(lengths)
+
+            # generate_bits stops after the word that reaches bitcount, later outputs are given back
+            if(ends[-1] >= needed):
+                used = int(numpy.searchsorted(ends, needed)) + 1
+                outputs, lengths = outputs[:used], lengths[:used]
+                self.state = int(outputs[-1])
+
+            # Row i holds the 32 bits of word i from the most significant one, the word is its last lengths[i] bits
+            bits = numpy.unpackbits(outputs.astype(">u4").view(numpy.uint8)).reshape(-1, 32)
+            chunks.append(bits[columns[None, :] >= 32 - lengths[:, None]])
+            needed -= len(chunks[-1])
+
+        return numpy.concatenate(chunks) if chunks else numpy.zeros(0, dtype=numpy.uint8)
+
+    def generate_bit_array(self, bitcount, lsb=False):
+        """
+            Bulk version of generate_bits (or generate_bits_lsb) that returns the bits as a numpy uint8 array of 0s and 1s.
+            The bits and the final state are identical to the original methods.
+        """
+        if(lsb):
+            return (self.generate_array(bitcount) & 1).astype(numpy.uint8)
+        return self.generate_word_bits(bitcount)[:bitcount]
+
+    def chunks(self, bitcount=None, chunk_bits=CHUNK_BITS, lsb=False):
+        """
+            Yields the bits of generate_bits (or generate_bits_lsb) as packed blocks of chunk_bits bits, most significant bit
+            first. Each block continues exactly where the previous one ended, an output split between two blocks included, so
+            the blocks joined together equal generate_bits(bitcount) and memory stays constant however long the sequence is.
+
+            Args:
+                bitcount (int): Total number of bits, None for an endless stream
+                chunk_bits (int): Bits per block, a multiple of 8. The last block is shorter if bitcount is not a multiple of it
+                lsb (bool): Blocks of generate_bits_lsb instead of generate_bits
+
+            Yields:
+                bytes: Packed block, the last byte of a short final block is padded with zeros
+        """
+        if(chunk_bits % 8 != 0):
+            print("Error! chunk_bits must be a multiple of 8.")
+            return
+
+        pending = numpy.zeros(0, dtype=numpy.uint8)     # Bits of the last output that did not fit into the previous block
+        produced = 0
+        while bitcount is None or produced < bitcount:
+            block = chunk_bits if bitcount is None else min(chunk_bits, bitcount - produced)
+            if(lsb):
+                bits = self.generate_bit_array(block, True)
+            else:
+                bits = numpy.concatenate((pending, self.generate_word_bits(block - len(pending))))
+                bits, pending = bits[:block], bits[block:]
+            produced += block
+            yield numpy.packbits(bits).tobytes()
+
+    def generate_bits_packed(self, bitcount, lsb=False):
+        """
+            Bulk version of generate_bits (or generate_bits_lsb) packed 8 bits per byte, most significant bit first.
+            The last byte is padded with zeros.
+        """
+        return numpy.packbits(self.generate_bit_array(bitcount, lsb)).tobytes()
+
+    def generate_bits_fast(self, bitcount, lsb=False):
+        """
+            Bulk version of generate_bits (or generate_bits_lsb) that returns the same ASCII bitstring and final state.
+        """
+        return (self.generate_bit_array(bitcount, lsb) + ord("0")).tobytes().decode("ascii")
+
     def generate_bits(self, bitcount):
         """
             Returns a bitstring of a given length by concatenating entire LCG generated numbers together.
@@ -40,3 +167,26 @@ class LCG:
             
         bits = bits[:bitcount]
         return bits
+
+
+
+def random_lcg(trial):
+    """
+        The default LCG for trial 0, random parameters otherwise, with a random seed. Used by check_jump.
+    """
+    if(trial == 0):
+        lcg = LCG()
+    else:
+        lcg = LCG(random.randrange(2**32), random.randrange(2**32), random.randrange(2, 65))
+    lcg.seed(random.randrange(2**64))
+    return lcg
+
+
+
+if __name__ == "__main__":
+    try:
+        trials = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+        if(check_jump(random_lcg, LCG.gen, trials)):
+            print(f"jump, at and split match stepping in {trials} trials.")
+    except ValueError:
+        print("Error! Call script with: py lcg.py [trials]")
@@ -0,0 +1,178 @@
+# Group 7
+# CPSC 418 - Explorations of Pseudo Random Number Generation
+# April 2025
+
+import json
+import os
+import sys
+
+from lcg import *
+from bbs import *
+from sequence_file import Sequence, write_sequence, EXTENSION
+
+"""
+    Campaigns stored as a manifest instead of their output. Every generator here is deterministic given its parameters and seed,
+    so generate_numbers.py with the manifest flag only records how each sequence was made, a few hundred bytes per sequence, and
+    a Campaign regenerates a sequence the first time it is asked for.
+
+    Regenerated sequences are kept as .bits files (see sequence_file.py) in <campaign>/cache. The cache is bounded: once it holds
+    more than max_bytes, the least recently used sequences are deleted, so a campaign of tens of thousands of sequences can be
+    tested with a few of them on disk at a time.
+
+    MANIFEST_NAME in a campaign directory holds a JSON object with a list of sequences, each with:
+        name            File name without extension, e.g. 0_bbs_urand
+        generator       "bbs" or "lcg"
+        params          BBS: p, q and bits_per_step. LCG: multiplier, increment, modulus (2^n - 1, not n) and lsb
+        seed_type       "urand", "rand" or "time" (see seed_gen.py)
+        seed            The seed passed to seed()
+        length          Number of bits
+
+    To list a campaign or materialize some of its sequences:
+        py manifest.py <campaign_dir> [name ...]
+"""
+
+MANIFEST_NAME = "manifest.json"
+CACHE_DIR = "cache"
+CACHE_BYTES = 2**30         # Default size of the cache, 1 GiB
+
+
+
+def write_manifest(directory: str, entries: list):
+    """
+        Writes the manifest of a campaign, sorted by name so the file does not depend on the order triplets finished in.
+
+        Args:
+            directory (str): Campaign directory
+            entries (list): One dict per sequence, see the module description
+    """
+    entries = sorted(entries, key=lambda entry: [int(part) if part.isdigit() else part for part in entry["name"].split("_")])
+    with open(os.path.join(directory, MANIFEST_NAME + ".tmp"), "w") as f:
+        json.dump({"sequences": entries}, f, separators=(",", ":"))
+    os.replace(os.path.join(directory, MANIFEST_NAME + ".tmp"), os.path.join(directory, MANIFEST_NAME))
+
+
+
+def read_manifest(directory: str):
+    """ The sequences of a campaign by name, None if the directory has no manifest. """
+    path = os.path.join(directory, MANIFEST_NAME)
+    if(not os.path.isfile(path)):
+        return None
+    with open(path, "r") as f:
+        return {entry["name"]: entry for entry in json.load(f)["sequences"]}
+
+
+
+def regenerate(entry: dict, bit_count: int = None):
+    """
+        Recreates the generator of a manifest entry and returns its bits as packed blocks, see LCG.chunks and BBS.chunks.
+
+        Args:
+            entry (dict): A manifest entry
+            bit_count (int): Bits to generate, None for the length of the entry
+
+        Returns:
+            iterator: Packed blocks, None for an unknown generator
+    """
+    params = entry["params"]
+    bit_count = entry["length"] if bit_count is None else bit_count
+
+    if(entry["generator"] == "bbs"):
+        bbs = BBS(p=params["p"], q=params["q"])
+        bbs.seed(entry["seed"])
+        return bbs.chunks(bit_count, bits_per_step=params["bits_per_step"])
+    if(entry["generator"] == "lcg"):
+        lcg = LCG(params["multiplier"], params["increment"], params["modulus"].bit_length())     # LCG takes n of 2^n - 1
+        lcg.seed(entry["seed"])
+        return lcg.chunks(bit_count, lsb=params["lsb"])
+
+    print(f"Error! Unknown generator {entry['generator']} for {entry['name']}.")
+    return None
+
+
+
+class Campaign:
+    def __init__(self, directory: str, max_bytes: int = CACHE_BYTES):
+        """
+            Opens the manifest of a campaign.
+
+            Args:
+                directory (str): Campaign directory holding MANIFEST_NAME
+                max_bytes (int): Size of <directory>/cache above which the least recently used sequences are deleted
+        """
+        self.sequences = read_manifest(directory)
+        if(self.sequences is None):
+            raise ValueError(f"{directory} has no {MANIFEST_NAME}")
+        self.cache = os.path.join(directory, CACHE_DIR)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache, exist_ok=True)
+
+    def names(self):
+        """ Names of every sequence of the campaign. """
+        return list(self.sequences)
+
+    def path(self, name: str):
+        """
+            Path of the .bits file of a sequence, regenerated into the cache if it is not there yet.
+
+            Returns:
+                str: Path in the cache, None for an unknown name or an entry that could not be regenerated
+        """
+        if(name not in self.sequences):
+            print(f"Error! {name} is not part of the campaign.")
+            return None
+
+        entry = self.sequences[name]
+        path = os.path.join(self.cache, name + EXTENSION)
+        if(os.path.isfile(path)):
+            os.utime(path)      # The mtime orders the cache by last use
+            return path
+
+        metadata = {key: entry[key] for key in ("generator", "params", "seed_type", "seed")}
+        chunks = regenerate(entry)
+        if(chunks is None or write_sequence(path, chunks, entry["length"], metadata) is None):
+            return None
+        self.evict(keep=path)
+        return path
+
+    def open(self, name: str, verify: bool = True):
+        """ The Sequence of a sequence, see path. The caller closes it. None if the sequence could not be regenerated. """
+        path = self.path(name)
+        return None if path is None else Sequence(path, verify)
+
+    def cache_size(self):
+        """ Bytes of the .bits files in the cache. """
+        return sum(os.path.getsize(os.path.join(self.cache, f)) for f in os.listdir(self.cache) if f.endswith(EXTENSION))
+
+    def evict(self, keep: str = None):
+        """ Deletes the least recently used sequences until the cache holds at most max_bytes, except keep. """
+        files = []
+        for f in os.listdir(self.cache):
+            path = os.path.join(self.cache, f)
+            if(f.endswith(EXTENSION) and path != keep):
+                files.append((os.path.getmtime(path), os.path.getsize(path), path))
+
+        total = sum(size for _, size, _ in files) + (os.path.getsize(keep) if keep is not None else 0)
+        for _, size, path in sorted(files):
+            if(total <= self.max_bytes):
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:       # Already evicted by another process sharing the cache
+                pass
+            total -= size
+
+
+
+if __name__ == "__main__":
+    try:
+        campaign = Campaign(sys.argv[1])
+        if(len(sys.argv) > 2):
+            for name in sys.argv[2:]:
+                print(f"{name}: {campaign.path(name)}")
+        else:
+            for name, entry in campaign.sequences.items():
+                print(f"{name}: {entry['generator']}, {entry['seed_type']} seed {entry['seed']}, {entry['length']} bits")
+        print(f"{len(campaign.sequences)} sequences, {campaign.cache_size()} bytes in {campaign.cache}")
+    except (IndexError, OSError, ValueError) as e:
+        print("Error! Call script with: py manifest.py <campaign_dir> [name ...]")
+        print(f"\n {e}")
@@ -0,0 +1,173 @@
+# Group 7
+# CPSC 418 - Explorations of Pseudo Random Number Generation
+# April 2025
+
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+import uuid
+
+from bbs import *
+
+"""
+    A disk-backed pool of verified Blum prime pairs (p, q) for BBS, so campaigns do not spend seconds on a prime search for every
+    generator. The pool is filled ahead of time, by the CLI below or by start_filler while a campaign runs, and BBS.from_pool()
+    takes a pair out of it.
+
+    Every pair is one JSON file. It is written to <pool>/tmp and renamed into <pool>/ready once complete, and claiming a pair
+    renames it from ready to <pool>/claimed. Renames are atomic, so several processes can fill and claim from the same pool
+    and no pair is ever handed out twice unless reuse is asked for.
+
+    fill runs in the foreground, so to fill the pool while generating, start it in a second terminal. To fill the pool or check
+    how many pairs are left:
+        py modulus_pool.py fill <count> [bits] [processes] [pool_dir]
+        py modulus_pool.py status [pool_dir]
+"""
+
+POOL_DIR = "./modulus_pool"     # Default pool next to ./test_data
+
+
+
+def pool_dirs(path: str):
+    """ Creates the tmp, ready and claimed directories of a pool if needed and returns their paths. """
+    dirs = tuple(os.path.join(path, name) for name in ("tmp", "ready", "claimed"))
+    for d in dirs:
+        os.makedirs(d, exist_ok=True)
+    return dirs
+
+
+
+def is_blum_prime(p: int):
+    """ True if p is a prime ≡ 3 mod 4, checked with the 20 Miller-Rabin rounds of BBS.is_prime. """
+    return p % 4 == 3 and BBS.is_prime(p)
+
+
+
+def add_pair(p: int, q: int, path: str = POOL_DIR, verify: bool = True):
+    """
+        Adds a (p, q) pair to the pool.
+
+        Args:
+            p, q (int): Distinct Blum primes of the same bit length
+            path (str): Directory of the pool
+            verify (bool): Check that p and q are distinct Blum primes first. Pairs made by BBS are already checked
+
+        Returns:
+            bool: True if the pair was added
+    """
+    if(p.bit_length() != q.bit_length() or p == q):
+        print("Error! p and q must be distinct primes of the same bit length.")
+        return False
+    if(verify and not (is_blum_prime(p) and is_blum_prime(q))):
+        print("Error! p and q must both be primes ≡ 3 mod 4.")
+        return False
+
+    tmp, ready, _ = pool_dirs(path)
+    name = f"{p.bit_length()}_{uuid.uuid4().hex}.json"
+    with open(os.path.join(tmp, name), "w") as f:
+        json.dump({"bits": p.bit_length(), "p": p, "q": q}, f)
+    os.replace(os.path.join(tmp, name), os.path.join(ready, name))     # Claimers never see a partly written pair
+    return True
+
+
+
+def fill(count: int, bits: int = 1024, path: str = POOL_DIR, processes: int = 1):
+    """
+        Generates count new pairs and adds them to the pool.
+
+        Args:
+            count (int): Number of pairs
+            bits (int): Bits of p and q
+            path (str): Directory of the pool
+            processes (int): Processes that search for each pair, see BBS
+    """
+    for i in range(count):
+        start_time = time.time()
+        bbs = BBS(bits, processes)
+        add_pair(bbs.p, bbs.q, path, verify=False)
+        print(f"Added pair {i + 1}/{count} in {round(time.time() - start_time, 2)} seconds.")
+
+
+
+def _fill(count: int, bits: int, path: str, processes: int):
+    """ fill in a new process. A forked process starts with the random state of its parent, so it is reseeded first. """
+    random.seed()       # Otherwise a parent that falls back to BBS() searches the same candidates and finds the same primes
+    fill(count, bits, path, processes)
+
+
+
+def start_filler(count: int, bits: int = 1024, path: str = POOL_DIR, processes: int = 1):
+    """
+        Fills the pool in a background process, see fill. Pairs can be claimed while it runs. The process is not a daemon, since
+        a daemon can not start the processes of BBS and would be killed with its parent, so a parent that exits first waits for it.
+
+        Returns:
+            multiprocessing.Process: The started process, join() it to wait for every pair
+    """
+    process = multiprocessing.Process(target=_fill, args=(count, bits, path, processes))
+    process.start()
+    return process
+
+
+
+def size(bits: int = 1024, path: str = POOL_DIR):
+    """ Number of unclaimed pairs of the given bit length. """
+    if(not os.path.isdir(os.path.join(path, "ready"))):
+        return 0
+    return sum(1 for name in os.listdir(os.path.join(path, "ready")) if name.startswith(f"{bits}_"))
+
+
+
+def claim(bits: int = 1024, path: str = POOL_DIR, reuse: bool = False):
+    """
+        Takes a pair out of the pool.
+
+        Args:
+            bits (int): Bits of p and q
+            path (str): Directory of the pool
+            reuse (bool): Hand out any pair, claimed ones included, without removing it. By default a pair is only used once
+
+        Returns:
+            tuple: (p, q), None if the pool has no pair of this size
+    """
+    _, ready, claimed = pool_dirs(path)
+    names = [(ready, name) for name in os.listdir(ready) if name.startswith(f"{bits}_")]
+    if(reuse):
+        names += [(claimed, name) for name in os.listdir(claimed) if name.startswith(f"{bits}_")]
+    random.shuffle(names)       # Processes claiming at the same time rarely race for the same file
+
+    for directory, name in names:
+        source = os.path.join(directory, name)
+        if(not reuse):
+            try:
+                os.rename(source, os.path.join(claimed, name))     # Only one claimer can move the file
+            except FileNotFoundError:
+                continue
+            source = os.path.join(claimed, name)
+
+        with open(source, "r") as f:
+            pair = json.load(f)
+        return (pair["p"], pair["q"])
+    return None
+
+
+
+if __name__ == "__main__":
+    try:
+        if(sys.argv[1] == "fill"):
+            count = int(sys.argv[2])
+            bits = int(sys.argv[3]) if len(sys.argv) > 3 else 1024
+            processes = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+            fill(count, bits, sys.argv[5] if len(sys.argv) > 5 else POOL_DIR, processes)
+        elif(sys.argv[1] == "status"):
+            path = sys.argv[2] if len(sys.argv) > 2 else POOL_DIR
+            claimed = len(os.listdir(os.path.join(path, "claimed"))) if os.path.isdir(os.path.join(path, "claimed")) else 0
+            print(f"{size(1024, path)} unclaimed 1024 bit pairs, {claimed} claimed pairs in {path}")
+        else:
+            raise ValueError(f"Unknown command {sys.argv[1]}")
+    except (IndexError, ValueError) as e:
+        print("Error! Call script with: py modulus_pool.py fill <count> [bits] [processes] [pool_dir] or py modulus_pool.py status [pool_dir]")
+        print(f"\n {e}")
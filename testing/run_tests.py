@@ -14,12 +14,17 @@
             - Example: py run_tests.py ./test_data/my_data
 
         3. The results of each test will be saved to a new directory within the passed directory named results. The result of an input file shares a name with the input file.
+            - Packed .bits files (see sequence_file.py) are read through a memory map, their results are saved as .txt like those of ASCII files
+            - The sequences of a manifest.json (see manifest.py) are regenerated into the cache of the directory as they are tested
 """
 
 import sys
 import os
 import numpy
 
+from sequence_file import Sequence, unpack_bits, EXTENSION
+from manifest import Campaign, MANIFEST_NAME
+
 testsuite_path = os.path.abspath("./randomness_testsuite")
 sys.path.insert(0, testsuite_path)
 
@@ -39,6 +44,131 @@ numpy.set_printoptions(precision=16, suppress=False) # Allows proper printing on
 
 
 
+def as_test_data(bits, packed_bits=None):
+    """
+        Returns the '0101...' string the test suite expects for a bit sequence, so generator output can be tested without writing and re-reading a file.
+
+        Args:
+            bits (str, bytes, bytearray): ASCII bits, one 0 or 1 byte per bit (BBS.generate_nist_output(output="bytes")) or packed bits
+            packed_bits (int): Number of bits if bits is packed 8 per byte, most significant bit first (output="packed", LCG.generate_bits_packed)
+
+    """
+    if(packed_bits is not None):
+        return unpack_bits(bits, packed_bits)
+    if(isinstance(bits, str)):
+        return bits
+    if(len(bits) > 0 and bits[0] in b"01"):
+        return bytes(bits).decode("ascii")
+    return bits.translate(bytes.maketrans(b"\x00\x01", b"01")).decode("ascii")
+
+
+
+def run_suite(test_data):
+    """
+        Runs every test of the suite on one sequence.
+
+        Args:
+            test_data (string): Bits in '0101...' format.
+
+        Returns:
+            list: One line per result, as written to the results files.
+
+    """
+    results = []
+    r = FrequencyTest.monobit_test(test_data)                   # This parsing is because for some reason values are printed as (np.float(), np.bool())
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"1. Frequency Test: {parsed_r}\n")
+
+    r = FrequencyTest.block_frequency(test_data)
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"2. Block Frequency Test: {parsed_r}\n")
+
+    r = RunTest.run_test(test_data)
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"3. Runs Test: {parsed_r}\n")
+
+    r = RunTest.longest_one_block_test(test_data)
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"4. Longest Run of Ones: {parsed_r}\n")
+
+    r = Matrix.binary_matrix_rank_text(test_data)
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"5. Binary Matrix Rank: {parsed_r}\n")
+    
+    r = SpectralTest.spectral_test(test_data)
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"6. Spectral Test: {parsed_r}\n")
+
+    r = TemplateMatching.non_overlapping_test(test_data, verbose=False, template_pattern='000000001')
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"7. Non-overlapping Template: {parsed_r}\n")
+
+    r = TemplateMatching.overlapping_patterns(test_data)
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"8. Overlapping Template: {parsed_r}\n")
+
+    r = Universal.statistical_test(test_data)
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"9. Universal Test: {parsed_r}\n")
+
+    r = ComplexityTest.linear_complexity_test(test_data)
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"10. Linear Complexity: {parsed_r}\n")
+
+    r = Serial.serial_test(test_data)
+    parsed_r = ((float(r[0][0]), bool(r[0][1])), (float(r[1][0]), bool(r[1][1])))   # Special: Returns ((pval, pass), (pval, pass))
+    results.append(f"11. Serial Test: {parsed_r}\n")
+
+    r = ApproximateEntropy.approximate_entropy_test(test_data)
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"12. Approximate Entropy: {parsed_r}\n")
+
+    r = CumulativeSums.cumulative_sums_test(test_data, 0)
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"13. Cumulative Sums (Forward): {parsed_r}\n")
+
+    r = CumulativeSums.cumulative_sums_test(test_data, 1)
+    parsed_r = (float(r[0]), bool(r[1]))
+    results.append(f"14. Cumulative Sums (Reverse): {parsed_r}\n")
+
+    # Random Excursions
+    results.append("\n15. Random Excursions:\n")
+    for item in RandomExcursions.random_excursions_test(test_data):
+        results.append(f"\tState {item[0]}: P-value = {item[3]}, {'Pass' if item[4] >= 0.01 else 'Fail'}\n")
+    
+    results.append("\n16. Random Excursions Variant:\n")
+    for item in RandomExcursions.variant_test(test_data):
+        results.append(f"\tState {item[0]}: P-value = {item[3]}, {'Pass' if item[4] >= 0.01 else 'Fail'}\n")
+
+    return results
+
+
+
+def run_on_sequence(bits, name, results_path, packed_bits=None):
+    """
+        Tests the first million bits of one sequence and writes the results to results_path/name.
+
+        Args:
+            bits (str, bytes, bytearray): The sequence in any format of as_test_data.
+            name (string): Name of the results file.
+            results_path (string): Directory of the results file.
+            packed_bits (int): Number of bits if bits is packed, see as_test_data.
+
+    """
+    test_data = as_test_data(bits, packed_bits)[:1000000]      # Isolate first million bits
+
+    results = run_suite(test_data)
+
+    # Write results to output file
+    fpath = results_path + "/" + name
+    with open(fpath, "w") as rfile:
+        for line in results:
+            rfile.write(line)
+
+    print(f"Results of {name} saved to {fpath}.")
+
+
+
 def run_on_dir(directory):
     """
         Runs the NIST SP800-22 testing suite written by https://github.com/stevenang/randomness_testsuite
@@ -53,7 +183,7 @@ def run_on_dir(directory):
     for file in os.listdir(directory):
         path = os.path.join(directory, file)
 
-        if(os.path.isfile(path)):
+        if(os.path.isfile(path) and not file.endswith(".tmp") and file != MANIFEST_NAME):     # .tmp files are still being written by generate_numbers.py
             files.append(path)
 
     # Create the results directory
@@ -64,88 +194,33 @@ def run_on_dir(directory):
         print("Error creating directory!")
         return -1
     
+    if(os.path.isfile(os.path.join(directory, MANIFEST_NAME))):
+        campaign = Campaign(directory)
+        for name in campaign.names():
+            sequence = campaign.open(name, verify=False)        # Checked while it was written to the cache
+            if(sequence is None):
+                print(f"Error! Could not regenerate {name}, skipping it.")
+                continue
+            with sequence:
+                run_on_sequence(sequence.packed(1000000), name + ".txt", results_path, min(sequence.length, 1000000))
+
     for file in files:
+        if(file.endswith(EXTENSION)):
+            if(os.path.splitext(file)[0] + ".txt" in files):
+                print(f"Skipping {file}, its ASCII twin is tested and both would save results as the same name.")
+                continue
+
+            # Only the first million bits are read from disk, the checksum is skipped since it would read every bit
+            with Sequence(file, verify=False) as sequence:
+                name = os.path.splitext(os.path.basename(file))[0] + ".txt"     # Same results name as the ASCII file, see analyze.py
+                run_on_sequence(sequence.packed(1000000), name, results_path, min(sequence.length, 1000000))
+            continue
+
         # Read bits
         with open(file, "r") as f:
             bits = f.read().strip()
 
-        test_data = bits[:1000000]      # Isolate first million bits (fairly certain this is redundant)
-
-        # Run and save all tests
-        results = []
-        r = FrequencyTest.monobit_test(test_data)                   # This parsing is because for some reason values are printed as (np.float(), np.bool())
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"1. Frequency Test: {parsed_r}\n")
-
-        r = FrequencyTest.block_frequency(test_data)
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"2. Block Frequency Test: {parsed_r}\n")
-
-        r = RunTest.run_test(test_data)
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"3. Runs Test: {parsed_r}\n")
-
-        r = RunTest.longest_one_block_test(test_data)
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"4. Longest Run of Ones: {parsed_r}\n")
-
-        r = Matrix.binary_matrix_rank_text(test_data)
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"5. Binary Matrix Rank: {parsed_r}\n")
-        
-        r = SpectralTest.spectral_test(test_data)
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"6. Spectral Test: {parsed_r}\n")
-
-        r = TemplateMatching.non_overlapping_test(test_data, verbose=False, template_pattern='000000001')
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"7. Non-overlapping Template: {parsed_r}\n")
-
-        r = TemplateMatching.overlapping_patterns(test_data)
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"8. Overlapping Template: {parsed_r}\n")
-
-        r = Universal.statistical_test(test_data)
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"9. Universal Test: {parsed_r}\n")
-
-        r = ComplexityTest.linear_complexity_test(test_data)
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"10. Linear Complexity: {parsed_r}\n")
-
-        r = Serial.serial_test(test_data)
-        parsed_r = ((float(r[0][0]), bool(r[0][1])), (float(r[1][0]), bool(r[1][1])))   # Special: Returns ((pval, pass), (pval, pass))
-        results.append(f"11. Serial Test: {parsed_r}\n")
-
-        r = ApproximateEntropy.approximate_entropy_test(test_data)
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"12. Approximate Entropy: {parsed_r}\n")
-
-        r = CumulativeSums.cumulative_sums_test(test_data, 0)
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"13. Cumulative Sums (Forward): {parsed_r}\n")
-
-        r = CumulativeSums.cumulative_sums_test(test_data, 1)
-        parsed_r = (float(r[0]), bool(r[1]))
-        results.append(f"14. Cumulative Sums (Reverse): {parsed_r}\n")
-
-        # Random Excursions
-        results.append("\n15. Random Excursions:\n")
-        for item in RandomExcursions.random_excursions_test(test_data):
-            results.append(f"\tState {item[0]}: P-value = {item[3]}, {'Pass' if item[4] >= 0.01 else 'Fail'}\n")
-        
-        results.append("\n16. Random Excursions Variant:\n")
-        for item in RandomExcursions.variant_test(test_data):
-            results.append(f"\tState {item[0]}: P-value = {item[3]}, {'Pass' if item[4] >= 0.01 else 'Fail'}\n")
-
-        # Write results to output file
-        fname = os.path.basename(file)
-        fpath = results_path + "/" + fname
-        with open(fpath, "w") as rfile:
-            for line in results:
-                rfile.write(line)
-        
-        print(f"Results of {fname} saved to {fpath}.")
+        run_on_sequence(bits, os.path.basename(file), results_path)
 
     print("=" * 15)
     print(f"Finished testing {directory}")
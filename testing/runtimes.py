@@ -18,13 +18,14 @@ import time
 
 
 
-def average_seed_generation(seeds, algorithm):
+def average_seed_generation(seeds, algorithm, use_pool=False):
     """
         Gets the average time required to generate a seed using urand. Uses a new BBS number for each generation.
 
         Args:
             seeds (int): The number of seeds to generate.
             algorithm (string): One of "urand", "rand", "time"
+            use_pool (bool): Take each BBS from the modulus pool (see modulus_pool.py) instead of generating new primes.
         
         Returns:
             float: The average time taken to generate each seed in ms
@@ -43,7 +44,7 @@ def average_seed_generation(seeds, algorithm):
 
     runtimes = []
     for i in range(seeds):
-        bbs = BBS()
+        bbs = BBS.from_pool() if use_pool else BBS()
         m = bbs.get_m()
 
         start_time = time.time()
@@ -59,9 +60,9 @@ def average_seed_generation(seeds, algorithm):
 
 
 
-def get_bbs_seeds(number_of_seeds):
+def get_bbs_seeds(number_of_seeds, use_pool=False):
     """
-        Generates and returns bbs seeds generated using urand.
+        Generates and returns bbs seeds generated using urand. use_pool takes each BBS from the modulus pool (see modulus_pool.py).
 
         Returns:
             list: A list containing bbs seeds
@@ -70,7 +71,7 @@ def get_bbs_seeds(number_of_seeds):
 
     seeds = []
     for _ in range(number_of_seeds):
-        bbs = BBS()
+        bbs = BBS.from_pool() if use_pool else BBS()
         m = bbs.get_m()
         seed = seed_bbs_urand(m)
         seeds.append(seed)
@@ -79,12 +80,14 @@ def get_bbs_seeds(number_of_seeds):
 
 
 
-def average_number_generation_bbs(numbers):
+def average_number_generation_bbs(numbers, use_pool=False, crt=False):
     """
         Gets the average time required to generate a 1 million bit string using BBS. Does not include seeding time.
 
         Args:
             numbers (int): The amount of numbers to generate.
+            use_pool (bool): Take each BBS from the modulus pool (see modulus_pool.py) instead of generating new primes.
+            crt (bool): Square the residues mod p and q separately (see BBS.generate_bytes), False squares mod m.
         
         Returns:
             float: The average time taken to generate each number in seconds
@@ -92,13 +95,13 @@ def average_number_generation_bbs(numbers):
     """
     runtimes = []
     for i in range(numbers):
-        bbs = BBS()
+        bbs = BBS.from_pool() if use_pool else BBS()
         m = bbs.get_m()
         seed = seed_bbs_urand(m)
         bbs.seed(seed)
         
         start_time = time.time()
-        _ = bbs.generate_nist_output(1_000_000)
+        _ = bbs.generate_nist_output(1_000_000, crt)
         finish_time = time.time()
         runtimes.append(finish_time - start_time)
     
@@ -116,7 +119,7 @@ def average_number_generation_lcg(seeds, algorithm):
 
         Args:
             seeds (list): A list containing valid bbs seeds.
-            algorithm (string): One of "lcg_whole", "lcg_lsb"
+            algorithm (string): One of "lcg_whole", "lcg_lsb", or "lcg_bulk_whole", "lcg_bulk_lsb" for LCG.generate_bits_fast
         
         Returns:
             float: The average time taken to generate each number in seconds
@@ -141,6 +144,14 @@ def average_number_generation_lcg(seeds, algorithm):
             _ = lcg.generate_bits_lsb(1_000_000)
             finish_time = time.time()
             runtimes.append(finish_time - start_time)
+
+    elif(algorithm == "lcg_bulk_whole" or algorithm == "lcg_bulk_lsb"):
+        for i in range(len(seeds)):
+            lcg.seed(seeds[i])
+            start_time = time.time()
+            _ = lcg.generate_bits_fast(1_000_000, algorithm == "lcg_bulk_lsb")
+            finish_time = time.time()
+            runtimes.append(finish_time - start_time)
     else:
         print("Error! Invalid algorithm argument.")
         return None
@@ -191,6 +202,8 @@ if __name__ == "__main__":
 
     # print(average_number_generation_lcg(valid_bbs_seeds, "lcg_whole"))    # 23.5043ms
     # print(average_number_generation_lcg(valid_bbs_seeds, "lcg_lsb"))      # 481.081ms
+    # print(average_number_generation_lcg(valid_bbs_seeds, "lcg_bulk_whole"))   # 8.1896ms
+    # print(average_number_generation_lcg(valid_bbs_seeds, "lcg_bulk_lsb"))     # 16.0593ms
 
     # print(average_bbs_init(100))                  # 2641.8598ms
     # print(average_number_generation_bbs(100))     # 8848.161ms
\ No newline at end of file
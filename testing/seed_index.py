@@ -0,0 +1,264 @@
+# Group 7
+# CPSC 418 - Explorations of Pseudo Random Number Generation
+# April 2025
+
+import os
+import sys
+import time
+
+import numpy
+
+from lcg import *
+from sequence_file import Sequence, read_header, EXTENSION
+
+"""
+    Recovers the seeds of the time and rand seeded LCG files made by generate_numbers.py (N_lcg_time.txt and N_lcg_rand.txt, or
+    their .bits versions, see sequence_file.py).
+
+    Both seed types come from a microsecond clock (see seed_gen.py), so given a rough generation time, e.g. the mtime of the file, the
+    seed is one of the clock values shortly before it. A SeedIndex computes the first 64 output bits of every clock value in a window
+    once and sorts them into buckets by their top BUCKET_BITS bits. A lookup then only recomputes the few candidates in one bucket,
+    so it takes constant time however large the window is, and files generated close together share one index.
+
+    Building is the expensive part: about 2 seconds per 10^7 clock values on one core, and about 8 bytes per clock value (a uint32
+    bucket and a uint32 offset) plus 64 MiB of bucket starts and the temporary arrays of one CHUNK. The default window of 10^7
+    microseconds, 10 seconds before the mtime, covers the time generate_numbers.py takes to write an LCG file and needs about
+    200 MB. Files written long after they were seeded need a larger window_us: 10^8 takes about 20 seconds and 1 GB. Files whose
+    windows overlap share an index only while its span stays below MAX_GROUP_WINDOWS windows, so a long campaign is indexed in
+    several pieces instead of one index over its whole duration.
+
+    To recover the seeds of every LCG file in a directory:
+        py seed_index.py <directory> [window_us] [lsb]
+
+    lsb must be given for files made with generate_bits_lsb.
+"""
+
+PREFIX_BITS = 64            # Output bits that identify a seed
+BUCKET_BITS = 24            # Top bits of the prefix that select a bucket
+CHUNK = 2**22               # Clock values sorted at once while building
+PREFIX_CHUNK = 2**14        # Clock values stepped at once, small enough to stay in cache
+WINDOW = 10**7              # Default microseconds before the estimate that are indexed
+SLACK = 10**6               # Microseconds after the estimate that are indexed as well (clock skew)
+MAX_GROUP_WINDOWS = 2       # Largest span of a shared index, in windows of one file
+MAX_LENGTH = 2**32          # Offsets are uint32, so an index covers fewer clock values than this
+KINDS = ("time", "rand")    # Seed types of generate_numbers.py that come from the clock
+
+
+
+def seeding_states(times, kind: str, lcg):
+    """
+        Returns the LCG state after lcg.seed() for files seeded from the clock values times.
+
+        Args:
+            times (numpy.ndarray): Clock values in microseconds as uint64
+            kind (str): "time" seeds with the clock (seed_bbs_time), "rand" with the first output of a C rand LCG seeded with it (seed_bbs_rand)
+            lcg (LCG): Generator of the files, only its parameters are used
+    """
+    modulus = numpy.uint64(lcg.modulus)
+    state = times % modulus
+    if(kind == "rand"):
+        rand = LCG()
+        state = (numpy.uint64(rand.multiplier) * (times % numpy.uint64(rand.modulus)) + numpy.uint64(rand.increment)) % numpy.uint64(rand.modulus)
+        state = state % modulus
+    return state
+
+
+
+def bit_lengths(values):
+    """ Length of bin(value)[2:] for every value, 1 for 0 like bin(0). Exact below 2^53. """
+    return numpy.maximum(numpy.frexp(values.astype(numpy.float64))[1], 1).astype(numpy.uint64)
+
+
+
+def prefixes(states, lcg, lsb: bool = False):
+    """
+        Computes the first PREFIX_BITS bits of generate_bits (or generate_bits_lsb) for every state as integers, the first bit
+        being the most significant one.
+
+        Args:
+            states (numpy.ndarray): States after lcg.seed() as uint64
+            lcg (LCG): Generator of the files, the modulus must be at most 2^32
+            lsb (bool): Prefixes of generate_bits_lsb instead of generate_bits
+    """
+    a, c, m = numpy.uint64(lcg.multiplier % lcg.modulus), numpy.uint64(lcg.increment % lcg.modulus), numpy.uint64(lcg.modulus)
+    state = states.copy()
+    prefix = numpy.zeros(len(states), dtype=numpy.uint64)
+
+    if(lsb):
+        for _ in range(PREFIX_BITS):
+            state = (a * state + c) % m
+            prefix = (prefix << numpy.uint64(1)) | (state & numpy.uint64(1))
+        return prefix
+
+    # generate_bits concatenates bin() of every output, so the number of outputs that fill the prefix differs per state.
+    # Finished states are dropped, so the few that need many short outputs do not slow down the others
+    result = numpy.empty(len(states), dtype=numpy.uint64)
+    active = numpy.arange(len(states))
+    filled = numpy.zeros(len(states), dtype=numpy.uint64)
+    while len(active) > 0:
+        state = (a * state + c) % m
+        lengths = bit_lengths(state)
+        take = numpy.minimum(lengths, numpy.uint64(PREFIX_BITS) - filled)
+        prefix = (prefix << take) | (state >> (lengths - take))
+        filled += take
+
+        done = filled == PREFIX_BITS
+        if(done.any()):
+            result[active[done]] = prefix[done]
+            keep = ~done
+            active, state, prefix, filled = active[keep], state[keep], prefix[keep], filled[keep]
+    return result
+
+
+
+def prefix_of(bits: str):
+    """ Integer of the first PREFIX_BITS bits of a bitstring, see prefixes. """
+    return int(bits[:PREFIX_BITS], 2)
+
+
+
+class SeedIndex:
+    def __init__(self, start: int, length: int, kind: str = "time", lcg=None, lsb: bool = False):
+        """
+            Indexes the clock values start to start + length - 1.
+
+            Args:
+                start (int): First clock value in microseconds
+                length (int): Number of clock values, less than MAX_LENGTH
+                kind (str): One of KINDS
+                lcg (LCG): Generator of the files. None uses LCG(), the C rand parameters with a 2^31 - 1 modulus
+                lsb (bool): Index generate_bits_lsb files instead of generate_bits files
+
+            Raises:
+                ValueError: length is MAX_LENGTH or more
+        """
+        if(length >= MAX_LENGTH):
+            raise ValueError(f"An index covers fewer than {MAX_LENGTH} clock values, got {length}")
+        self.start = start
+        self.length = length
+        self.kind = kind
+        self.lcg = lcg or LCG()
+        self.lsb = lsb
+
+        # Pass 1: bucket of every clock value
+        shift = numpy.uint64(PREFIX_BITS - BUCKET_BITS)
+        buckets = numpy.empty(length, dtype=numpy.uint32)
+        for i in range(0, length, PREFIX_CHUNK):
+            times = numpy.arange(start + i, start + min(i + PREFIX_CHUNK, length), dtype=numpy.uint64)
+            buckets[i:i + len(times)] = prefixes(seeding_states(times, kind, self.lcg), self.lcg, lsb) >> shift
+
+        # Pass 2: counting sort of the offsets by bucket, chunk by chunk
+        counts = numpy.bincount(buckets, minlength=2**BUCKET_BITS)
+        self.starts = numpy.zeros(2**BUCKET_BITS + 1, dtype=numpy.uint32)
+        numpy.cumsum(counts, out=self.starts[1:])
+        self.offsets = numpy.empty(length, dtype=numpy.uint32)
+        fill = self.starts[:-1].astype(numpy.int64)
+
+        for i in range(0, length, CHUNK):
+            chunk = buckets[i:i + CHUNK]
+            chunk_counts = numpy.bincount(chunk, minlength=2**BUCKET_BITS)
+
+            # Sorting bucket << 32 | offset orders the chunk by bucket, faster than an argsort
+            keys = (chunk.astype(numpy.uint64) << numpy.uint64(32)) | numpy.arange(len(chunk), dtype=numpy.uint64)
+            keys.sort()
+            ordered = (keys >> numpy.uint64(32)).astype(numpy.int64)
+            rank = numpy.arange(len(chunk)) - (numpy.cumsum(chunk_counts) - chunk_counts)[ordered]
+            self.offsets[fill[ordered] + rank] = (keys & numpy.uint64(0xFFFFFFFF)) + i
+            fill += chunk_counts
+
+    def lookup(self, bits: str):
+        """
+            Finds the clock values whose output starts with bits.
+
+            Args:
+                bits (str): At least PREFIX_BITS bits of a file
+
+            Returns:
+                list: (clock value, seed passed to lcg.seed()) for every match
+        """
+        prefix = prefix_of(bits)
+        bucket = prefix >> (PREFIX_BITS - BUCKET_BITS)
+        candidates = self.offsets[self.starts[bucket]:self.starts[bucket + 1]]
+
+        # Several clock values share a bucket, recompute their full prefixes to find the right one
+        times = self.start + candidates.astype(numpy.uint64)
+        matches = times[prefixes(seeding_states(times, self.kind, self.lcg), self.lcg, self.lsb) == numpy.uint64(prefix)]
+        return [(int(t), self.seed_of(int(t))) for t in matches]
+
+    def seed_of(self, clock: int):
+        """ Seed generate_numbers.py passed to lcg.seed() for a clock value. """
+        if(self.kind == "rand"):
+            rand = LCG()
+            rand.seed(clock)
+            return rand.gen()
+        return clock
+
+
+
+def recover_directory(path: str, window: int = WINDOW, lsb: bool = False, lcg=None):
+    """
+        Recovers the seed of every N_lcg_time.txt and N_lcg_rand.txt in a directory, using the mtime of each file as its estimate.
+        Files whose windows overlap share one index as long as it spans at most MAX_GROUP_WINDOWS windows. .bits files made by
+        generate_numbers.py store their seed in the header and need no index, converted ones without a seed are searched like .txt files.
+
+        Args:
+            path (str): Directory made by generate_numbers.py
+            window (int): Microseconds before the mtime that are searched
+            lsb (bool): The files were made with generate_bits_lsb
+            lcg (LCG): Generator of the files, None for LCG()
+
+        Returns:
+            dict: File name: list of (clock value, seed), the clock value is None for seeds read from a .bits header of a rand file
+    """
+    results = {}
+    for kind in KINDS:
+        files = sorted(f for f in os.listdir(path) if f.endswith(f"_lcg_{kind}.txt") or f.endswith(f"_lcg_{kind}{EXTENSION}"))
+
+        for f in [f for f in files if f.endswith(EXTENSION)]:
+            metadata = read_header(os.path.join(path, f))
+            if(metadata is not None and metadata["seed"] is not None):
+                results[f] = [(metadata["seed"] if kind == "time" else None, metadata["seed"])]
+                print(f"{f}: seed {metadata['seed']} (from the header)")
+        files = [f for f in files if f not in results]
+        estimates = {f: int(os.path.getmtime(os.path.join(path, f)) * 1000000) for f in files}
+
+        # Group files into runs of overlapping windows, each run gets one index. A run is split once its index would span more than
+        # MAX_GROUP_WINDOWS windows, so the memory of an index does not grow with the length of the campaign
+        groups = []
+        for f in sorted(files, key=lambda f: estimates[f]):
+            if(len(groups) > 0 and estimates[f] - window <= estimates[groups[-1][-1]] + SLACK
+               and estimates[f] - estimates[groups[-1][0]] + window + SLACK <= MAX_GROUP_WINDOWS * (window + SLACK)):
+                groups[-1].append(f)
+            else:
+                groups.append([f])
+
+        for group in groups:
+            start = estimates[group[0]] - window
+            length = estimates[group[-1]] + SLACK - start
+            start_time = time.time()
+            index = SeedIndex(start, length, kind, lcg, lsb)
+            print(f"Indexed {length} {kind} seeds in {round(time.time() - start_time, 2)} seconds.")
+
+            for f in group:
+                if(f.endswith(EXTENSION)):
+                    with Sequence(os.path.join(path, f), verify=False) as sequence:
+                        bits = sequence.ascii(PREFIX_BITS)
+                else:
+                    with open(os.path.join(path, f), "r") as data:
+                        bits = data.read(PREFIX_BITS)
+                results[f] = index.lookup(bits)
+                found = ", ".join(f"seed {seed} (clock {clock})" for clock, seed in results[f]) or "no seed in the window"
+                print(f"{f}: {found}")
+
+    return results
+
+
+
+if __name__ == "__main__":
+    try:
+        window = int(sys.argv[2]) if len(sys.argv) > 2 else WINDOW
+        lsb = len(sys.argv) > 3 and sys.argv[3] == "lsb"
+        recover_directory(sys.argv[1], window, lsb)
+    except (IndexError, ValueError, OSError) as e:
+        print("Error! Call script with: py seed_index.py <directory> [window_us] [lsb]")
+        print(f"\n {e}")
@@ -0,0 +1,233 @@
+# Group 7
+# CPSC 418 - Explorations of Pseudo Random Number Generation
+# April 2025
+
+import hashlib
+import json
+import mmap
+import os
+import sys
+
+"""
+    A packed binary file format for test sequences, 1 bit per bit instead of one ASCII character, so 8 times smaller than the
+    .txt files of generate_numbers.py.
+
+    A .bits file is a fixed HEADER_SIZE byte header followed by the packed bits, most significant bit first, with the last
+    byte padded with zeros. The header is MAGIC, the length of a JSON object as 4 bytes little endian, and the JSON object,
+    padded with spaces. The object records:
+        generator       "bbs" or "lcg"
+        params          Generator parameters, e.g. the LCG multiplier or the BBS modulus
+        seed_type       "urand", "rand" or "time" (see seed_gen.py)
+        seed            The seed, None if unknown (files converted from ASCII)
+        length          Number of bits
+        sha256          Checksum of the packed bits
+
+    Since the header has a fixed size, the bits always start at HEADER_SIZE and can be memory mapped directly.
+
+    To convert a directory of ASCII sequences to .bits files, written to <input_dir>_bits by default:
+        py sequence_file.py <input_dir> [output_dir]
+"""
+
+MAGIC = b"PRNGBITS"
+HEADER_SIZE = 4096
+EXTENSION = ".bits"
+
+
+
+def pack_header(metadata: dict):
+    """ Returns the HEADER_SIZE bytes of a header holding metadata, None if it does not fit. """
+    text = json.dumps(metadata).encode()
+    header = MAGIC + len(text).to_bytes(4, "little") + text
+    if(len(header) > HEADER_SIZE):
+        print("Error! The metadata does not fit into the header.")
+        return None
+    return header + b" " * (HEADER_SIZE - len(header))
+
+
+
+def read_header(fname: str):
+    """
+        Reads the metadata of a .bits file.
+
+        Returns:
+            dict: The header fields, None if the file is not a .bits file
+    """
+    with open(fname, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if(len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC):
+        print(f"Error! {fname} is not a {EXTENSION} file.")
+        return None
+    size = int.from_bytes(header[len(MAGIC):len(MAGIC) + 4], "little")
+    return json.loads(header[len(MAGIC) + 4:len(MAGIC) + 4 + size])
+
+
+
+def unpack_bits(packed, bit_count: int):
+    """ The first bit_count bits of bytes packed 8 per byte, most significant bit first, in '0101...' format. """
+    return bin(int.from_bytes(packed, "big") | (1 << 8 * len(packed)))[3:3 + bit_count]     # The extra top bit keeps leading zeros
+
+
+
+def write_sequence(fname: str, chunks, bit_count: int, metadata: dict):
+    """
+        Writes a .bits file from packed blocks, one block at a time, so only one block is held in memory. The file is written as
+        fname.tmp and renamed once complete, the header is filled in last since it holds the checksum. fname.tmp is removed again
+        if the blocks do not hold bit_count bits.
+
+        Args:
+            fname (str): Path of the new file
+            chunks (iterator): Packed blocks from LCG.chunks or BBS.chunks, most significant bit first
+            bit_count (int): Total number of bits in the blocks
+            metadata (dict): generator, params, seed_type and seed, see the module description. length and sha256 are added
+
+        Returns:
+            dict: The complete header, None on error
+    """
+    metadata = dict(metadata, length=bit_count, sha256="0" * 64)
+    if(pack_header(metadata) is None):     # The checksum has a fixed length, so the header is checked before anything is written
+        return None
+
+    checksum = hashlib.sha256()
+    with open(fname + ".tmp", "wb") as f:
+        f.write(b"\0" * HEADER_SIZE)
+        for block in chunks:
+            checksum.update(block)
+            f.write(block)
+        size = f.tell()
+
+        metadata["sha256"] = checksum.hexdigest()
+        f.seek(0)
+        f.write(pack_header(metadata))
+
+    if(size != HEADER_SIZE + (bit_count + 7) // 8):
+        print(f"Error! Expected {bit_count} bits for {fname}.")
+        os.remove(fname + ".tmp")
+        return None
+    os.replace(fname + ".tmp", fname)
+    return metadata
+
+
+
+class Sequence:
+    def __init__(self, fname: str, verify: bool = True):
+        """
+            Opens a .bits file through a memory map, so only the parts that are used are read from disk.
+
+            Args:
+                fname (str): Path of the file
+                verify (bool): Compare the checksum of the bits with the header
+        """
+        self.metadata = read_header(fname)
+        if(self.metadata is None):
+            raise ValueError(f"{fname} is not a {EXTENSION} file")
+        self.length = self.metadata["length"]
+
+        with open(fname, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.bits = memoryview(self.map)[HEADER_SIZE:HEADER_SIZE + (self.length + 7) // 8]
+
+        if(verify and hashlib.sha256(self.bits).hexdigest() != self.metadata["sha256"]):
+            self.close()
+            raise ValueError(f"The checksum of {fname} does not match its header")
+
+    def packed(self, bit_count: int = None):
+        """ The packed bits of the first bit_count bits (every bit by default). Only the pages holding them are read from disk. """
+        bit_count = self.length if bit_count is None else min(bit_count, self.length)
+        return bytes(self.bits[:(bit_count + 7) // 8])     # A copy, so the map can be closed while it is still in use
+
+    def ascii(self, bit_count: int = None):
+        """ The first bit_count bits (every bit by default) in '0101...' format. """
+        bit_count = self.length if bit_count is None else min(bit_count, self.length)
+        return unpack_bits(self.packed(bit_count), bit_count)
+
+    def close(self):
+        self.bits.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+
+def metadata_from_name(fname: str):
+    """ Generator and seed type of a file named like generate_numbers.py does, N_<generator>_<seed type>.txt. """
+    parts = os.path.splitext(os.path.basename(fname))[0].split("_")
+    if(len(parts) == 3):
+        return {"generator": parts[1], "params": None, "seed_type": parts[2], "seed": None}
+    return {"generator": None, "params": None, "seed_type": None, "seed": None}
+
+
+
+def ascii_to_sequence(source: str, destination: str, metadata: dict = None, chunk_bytes: int = 2**20):
+    """
+        Converts an ASCII file of '0' and '1' characters to a .bits file, chunk_bytes characters at a time.
+
+        Args:
+            source (str): ASCII file
+            destination (str): New .bits file
+            metadata (dict): Header fields, None takes them from the file name (see metadata_from_name)
+            chunk_bytes (int): Characters converted at once, a multiple of 8
+
+        Returns:
+            dict: The complete header, None on error
+    """
+    metadata = metadata or metadata_from_name(source)
+    bit_count = 0
+    with open(source, "rb") as f:
+        while True:
+            text = f.read(chunk_bytes).strip()
+            if(len(text) == 0):
+                break
+            bit_count += len(text)
+
+    def chunks():
+        with open(source, "rb") as f:
+            while True:
+                text = f.read(chunk_bytes).strip()
+                if(len(text) == 0):
+                    return
+                padding = -len(text) % 8
+                yield (int(text, 2) << padding).to_bytes((len(text) + padding) // 8, "big")
+
+    return write_sequence(destination, chunks(), bit_count, metadata)
+
+
+
+def convert_directory(path: str, output: str = None):
+    """
+        Converts every .txt sequence of a directory made by generate_numbers.py to a .bits file.
+
+        Args:
+            path (str): Directory of ASCII sequences
+            output (str): Directory of the .bits files, None for <path>_bits. Not path itself by default, since run_tests.py would
+                test every sequence twice
+    """
+    output = output or os.path.normpath(path) + "_bits"
+    os.makedirs(output, exist_ok=True)
+
+    ascii_size, binary_size = 0, 0
+    for name in sorted(os.listdir(path)):
+        source = os.path.join(path, name)
+        if(not name.endswith(".txt") or not os.path.isfile(source)):
+            continue
+
+        destination = os.path.join(output, os.path.splitext(name)[0] + EXTENSION)
+        if(ascii_to_sequence(source, destination) is None):
+            continue
+        ascii_size += os.path.getsize(source)
+        binary_size += os.path.getsize(destination)
+        print(f"Converted {source} to {destination}")
+
+    print(f"{ascii_size} bytes of ASCII converted to {binary_size} bytes.")
+
+
+
+if __name__ == "__main__":
+    try:
+        convert_directory(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    except (IndexError, OSError, ValueError) as e:
+        print("Error! Call script with: py sequence_file.py <input_dir> [output_dir]")
+        print(f"\n {e}")